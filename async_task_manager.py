@@ -0,0 +1,382 @@
+"""Asyncio Task Manager - CRUD operations on an async connection pool
+
+Runs on aiomysql against the configured MySQL server, or on aiosqlite as a
+server-free stand-in for tests and local use. Both drivers are optional
+dependencies and are only imported when their pool is created.
+"""
+import asyncio
+import datetime
+import os
+import sqlite3
+import tempfile
+from contextlib import asynccontextmanager
+from config import (DB_CONFIG, POOL_CONFIG, PAGE_SIZE, STREAM_BATCH_SIZE, SEARCH_LIMIT,
+                    FT_MIN_TOKEN_SIZE, BULK_CHUNK_SIZE, ARCHIVE)
+from search_index import tokenize
+from storage import INNODB_STOPWORDS, SQLITE_SCHEMA, SQLITE_ARCHIVE_SCHEMA, register_sqlite_types
+from task_manager import (BULK_INSERT_QUERY, TASK_COLUMNS, build_statistics, chunked,
+                          task_source, task_values)
+
+
+class AioMySQLPool:
+    """aiomysql connection pool speaking the MySQL schema from migrations.py"""
+
+    dialect = 'mysql'
+
+    def __init__(self, pool, error):
+        self._pool = pool
+        self.Error = error
+
+    @classmethod
+    async def create(cls, size=POOL_CONFIG['pool_size']):
+        import aiomysql
+        pool = await aiomysql.create_pool(
+            minsize=1, maxsize=size,
+            host=DB_CONFIG['host'], user=DB_CONFIG['user'],
+            password=DB_CONFIG['password'], db=DB_CONFIG['database'],
+            autocommit=False, pool_recycle=3600
+        )
+        return cls(pool, aiomysql.Error)
+
+    @asynccontextmanager
+    async def cursor(self, write=False):
+        import aiomysql
+        async with self._pool.acquire() as connection:
+            try:
+                async with connection.cursor(aiomysql.DictCursor) as cursor:
+                    yield cursor
+                await connection.commit()
+            except BaseException:
+                await connection.rollback()
+                raise
+
+    async def close(self):
+        self._pool.close()
+        await self._pool.wait_closed()
+
+
+class AioSQLitePool:
+    """A few aiosqlite connections to one SQLite database, used as a stand-in
+
+    The database is a file in WAL mode (a fresh temp file by default), so
+    each reader sees committed data on its own connection while the
+    single writer works. Writers are serialized.
+    """
+
+    dialect = 'sqlite'
+
+    def __init__(self, connections, error):
+        self._idle = asyncio.Queue()
+        for connection in connections:
+            self._idle.put_nowait(connection)
+        self._connections = connections
+        self._write_lock = asyncio.Lock()
+        self.Error = error
+
+    @classmethod
+    async def create(cls, path=None, size=4):
+        import aiosqlite
+        if path is None:
+            path = os.path.join(tempfile.mkdtemp(prefix='task_manager_async'), 'tasks.db')
+        register_sqlite_types()
+        connections = []
+        for _ in range(size):
+            # Dates and timestamps come back as objects, like from TaskManager
+            connection = await aiosqlite.connect(path, uri=path.startswith("file:"),
+                                                 detect_types=sqlite3.PARSE_DECLTYPES)
+            connection.row_factory = aiosqlite.Row
+            await connection.execute("PRAGMA busy_timeout = 5000")
+            if not connections:
+                # Readers do not block the writer in WAL mode
+                await connection.execute("PRAGMA journal_mode = WAL")
+            await connection.execute("PRAGMA synchronous = NORMAL")
+            connections.append(connection)
+        await connections[0].executescript(SQLITE_SCHEMA)
+        await connections[0].executescript(SQLITE_ARCHIVE_SCHEMA)
+        await connections[0].commit()
+        return cls(connections, aiosqlite.Error)
+
+    @asynccontextmanager
+    async def cursor(self, write=False):
+        if write:
+            async with self._write_lock:
+                async with self._cursor() as cursor:
+                    yield cursor
+        else:
+            async with self._cursor() as cursor:
+                yield cursor
+
+    @asynccontextmanager
+    async def _cursor(self):
+        connection = await self._idle.get()
+        try:
+            cursor = _SQLiteCursor(connection)
+            try:
+                yield cursor
+                await connection.commit()
+            except BaseException:
+                await connection.rollback()
+                raise
+        finally:
+            self._idle.put_nowait(connection)
+
+    async def close(self):
+        for connection in self._connections:
+            await connection.close()
+
+
+class _SQLiteCursor:
+    """Adapts aiosqlite to the DictCursor calls AsyncTaskManager makes"""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._cursor = None
+        self.rowcount = -1
+        self.lastrowid = None
+
+    async def execute(self, query, params=()):
+        self._cursor = await self._connection.execute(query.replace("%s", "?"), params)
+        self.rowcount = self._cursor.rowcount
+        self.lastrowid = self._cursor.lastrowid
+
+    async def executemany(self, query, rows):
+        self._cursor = await self._connection.executemany(query.replace("%s", "?"), rows)
+        self.rowcount = self._cursor.rowcount
+
+    async def fetchone(self):
+        row = await self._cursor.fetchone()
+        return dict(row) if row is not None else None
+
+    async def fetchmany(self, size):
+        return [dict(row) for row in await self._cursor.fetchmany(size)]
+
+    async def fetchall(self):
+        return [dict(row) for row in await self._cursor.fetchall()]
+
+
+class AsyncTaskManager:
+    """TaskManager's operations as coroutines over an async pool
+
+    Independent calls can be awaited together, e.g. refresh() fetches the
+    first page and the statistics concurrently on two pooled connections.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    @classmethod
+    async def connect(cls, backend='mysql', **kwargs):
+        """Create a manager on a new 'mysql' or 'sqlite' pool"""
+        pool_class = AioMySQLPool if backend == 'mysql' else AioSQLitePool
+        return cls(await pool_class.create(**kwargs))
+
+    async def close(self):
+        await self.pool.close()
+
+    async def add_task(self, title, description, priority='medium', due_date=None):
+        """Create a new task"""
+        try:
+            async with self.pool.cursor(write=True) as cursor:
+                query = "INSERT INTO tasks (title, description, priority, due_date) VALUES (%s, %s, %s, %s)"
+                await cursor.execute(query, (title, description, priority, due_date))
+            return True
+        except self.pool.Error as e:
+            print(f"Error adding task: {e}")
+            return False
+
+    async def add_tasks(self, tasks, chunk_size=BULK_CHUNK_SIZE):
+        """Create many tasks, one transaction per chunk; returns rows inserted"""
+        rows = (task_values(task) for task in tasks)
+        inserted = 0
+        try:
+            for chunk in chunked(rows, chunk_size):
+                async with self.pool.cursor(write=True) as cursor:
+                    await cursor.executemany(BULK_INSERT_QUERY, chunk)
+                inserted += len(chunk)
+        except self.pool.Error as e:
+            print(f"Error adding tasks: {e}")
+        return inserted
+
+    async def view_all_tasks(self, include_archived=False):
+        """Read all tasks"""
+        return await self._fetchall(
+            f"SELECT * FROM {task_source(include_archived)} ORDER BY created_at DESC, id DESC",
+            (), "fetching tasks")
+
+    async def get_tasks_page(self, limit=PAGE_SIZE, after=None, include_archived=False):
+        """Read one page of tasks newest first; returns (tasks, next_cursor)"""
+        source = task_source(include_archived)
+        if after is None:
+            query = f"SELECT * FROM {source} ORDER BY created_at DESC, id DESC LIMIT %s"
+            params = (limit,)
+        else:
+            created_at, task_id = after
+            query = (f"SELECT * FROM {source} "
+                     "WHERE created_at < %s OR (created_at = %s AND id < %s) "
+                     "ORDER BY created_at DESC, id DESC LIMIT %s")
+            params = (created_at, created_at, task_id, limit)
+        tasks = await self._fetchall(query, params, "fetching tasks")
+        next_cursor = None
+        if len(tasks) == limit:
+            next_cursor = (tasks[-1]['created_at'], tasks[-1]['id'])
+        return tasks, next_cursor
+
+    async def iter_task_batches(self, batch_size=STREAM_BATCH_SIZE, include_archived=False):
+        """Yield every task, newest first, in lists of at most batch_size rows
+
+        Pages by keyset instead of holding a server-side cursor open, so the
+        pooled connection is released between batches.
+        """
+        after = None
+        while True:
+            tasks, after = await self.get_tasks_page(batch_size, after, include_archived)
+            if tasks:
+                yield tasks
+            if after is None:
+                return
+
+    async def update_task_status(self, task_id, status):
+        """Update task status"""
+        return await self._write("UPDATE tasks SET status = %s WHERE id = %s",
+                                 (status, task_id), "updating task") > 0
+
+    async def update_status_many(self, task_ids, status, chunk_size=BULK_CHUNK_SIZE):
+        """Set the status of many tasks; returns rows changed"""
+        updated = 0
+        for chunk in chunked(task_ids, chunk_size):
+            placeholders = ", ".join(["%s"] * len(chunk))
+            updated += await self._write(
+                f"UPDATE tasks SET status = %s WHERE id IN ({placeholders})",
+                [status] + chunk, "updating tasks")
+        return updated
+
+    async def delete_task(self, task_id):
+        """Delete a task, archived or not"""
+        return await self.delete_many([task_id]) > 0
+
+    async def delete_many(self, task_ids, chunk_size=BULK_CHUNK_SIZE):
+        """Delete many tasks, archived or not; returns rows deleted"""
+        deleted = 0
+        try:
+            for chunk in chunked(task_ids, chunk_size):
+                placeholders = ", ".join(["%s"] * len(chunk))
+                async with self.pool.cursor(write=True) as cursor:
+                    await cursor.execute(f"DELETE FROM tasks WHERE id IN ({placeholders})", chunk)
+                    removed = cursor.rowcount
+                    await cursor.execute(
+                        f"DELETE FROM tasks_archive WHERE id IN ({placeholders})", chunk)
+                    removed += cursor.rowcount
+                deleted += removed
+        except self.pool.Error as e:
+            print(f"Error deleting tasks: {e}")
+        return deleted
+
+    async def archive_completed(self, older_than_days=ARCHIVE['age_days'],
+                                batch_size=ARCHIVE['batch_size'],
+                                max_batches=ARCHIVE['max_batches'], pause=ARCHIVE['pause']):
+        """Move old completed tasks into tasks_archive in short batches; returns rows moved"""
+        cutoff = datetime.datetime.now() - datetime.timedelta(days=older_than_days)
+        condition = "status = 'completed' AND created_at < %s"
+        lock = " FOR UPDATE" if self.pool.dialect == 'mysql' else ""
+        archived = 0
+        try:
+            for _ in range(max_batches):
+                async with self.pool.cursor(write=True) as cursor:
+                    await cursor.execute(f"SELECT id FROM tasks WHERE {condition} "
+                                         f"ORDER BY created_at, id LIMIT %s{lock}",
+                                         (cutoff, batch_size))
+                    ids = [row['id'] for row in await cursor.fetchall()]
+                    if ids:
+                        placeholders = ", ".join(["%s"] * len(ids))
+                        await cursor.execute(f"INSERT INTO tasks_archive ({TASK_COLUMNS}) "
+                                             f"SELECT {TASK_COLUMNS} FROM tasks "
+                                             f"WHERE id IN ({placeholders}) AND {condition}",
+                                             ids + [cutoff])
+                        await cursor.execute(f"DELETE FROM tasks WHERE id IN ({placeholders}) "
+                                             f"AND {condition}", ids + [cutoff])
+                        archived += cursor.rowcount
+                if len(ids) < batch_size:
+                    break
+                await asyncio.sleep(pause)
+        except self.pool.Error as e:
+            print(f"Error archiving tasks: {e}")
+        return archived
+
+    async def search_tasks(self, search_term, limit=SEARCH_LIMIT):
+        """Search tasks by title and description"""
+        terms = [t for t in tokenize(search_term)
+                 if len(t) >= FT_MIN_TOKEN_SIZE and t not in INNODB_STOPWORDS]
+        if self.pool.dialect == 'mysql' and terms:
+            against = " ".join(f"+{term}" for term in terms) + "*"
+            query = ("SELECT * FROM tasks "
+                     "WHERE MATCH(title, description) AGAINST (%s IN BOOLEAN MODE) "
+                     "ORDER BY MATCH(title, description) AGAINST (%s IN BOOLEAN MODE) DESC "
+                     "LIMIT %s")
+            return await self._fetchall(query, (against, against, limit), "searching tasks")
+        pattern = f"%{search_term}%"
+        query = ("SELECT * FROM tasks WHERE title LIKE %s OR description LIKE %s "
+                 "ORDER BY created_at DESC LIMIT %s")
+        return await self._fetchall(query, (pattern, pattern, limit), "searching tasks")
+
+    async def filter_by_status(self, status, include_archived=False):
+        """Filter tasks by status"""
+        return await self._fetchall(
+            f"SELECT * FROM {task_source(include_archived)} WHERE status = %s "
+            "ORDER BY created_at DESC", (status,), "filtering tasks")
+
+    async def get_statistics(self, include_archived=False):
+        """Get task statistics
+
+        MySQL reads the trigger-maintained counter tables; the SQLite
+        stand-in aggregates over tasks. Archived tasks only add to the counts.
+        """
+        archive_query = "SELECT status, priority, task_count FROM task_archive_stats"
+        if self.pool.dialect == 'mysql':
+            counts_query = "SELECT status, priority, task_count FROM task_stats"
+            overdue_query = ("SELECT status, SUM(task_count) as task_count FROM task_due_stats "
+                             "WHERE due_date < CURDATE() AND status <> 'completed' GROUP BY status")
+        else:
+            counts_query = ("SELECT status, priority, COUNT(*) as task_count FROM tasks "
+                            "GROUP BY status, priority")
+            overdue_query = ("SELECT status, COUNT(*) as task_count FROM tasks "
+                             "WHERE due_date < date('now', 'localtime') AND status <> 'completed' GROUP BY status")
+        try:
+            async with self.pool.cursor() as cursor:
+                await cursor.execute(counts_query)
+                counts = await cursor.fetchall()
+                if include_archived:
+                    await cursor.execute(archive_query)
+                    counts += await cursor.fetchall()
+                await cursor.execute(overdue_query)
+                overdue = await cursor.fetchall()
+        except self.pool.Error as e:
+            print(f"Error getting statistics: {e}")
+            return None
+        return build_statistics(counts, overdue)
+
+    async def refresh(self, limit=PAGE_SIZE):
+        """Fetch the first page and the statistics concurrently
+
+        Returns (tasks, next_cursor, stats).
+        """
+        (tasks, next_cursor), stats = await asyncio.gather(
+            self.get_tasks_page(limit), self.get_statistics())
+        return tasks, next_cursor, stats
+
+    async def _fetchall(self, query, params, action):
+        try:
+            async with self.pool.cursor() as cursor:
+                await cursor.execute(query, params)
+                return await cursor.fetchall()
+        except self.pool.Error as e:
+            print(f"Error {action}: {e}")
+            return []
+
+    async def _write(self, query, params, action):
+        try:
+            async with self.pool.cursor(write=True) as cursor:
+                await cursor.execute(query, params)
+                return cursor.rowcount
+        except self.pool.Error as e:
+            print(f"Error {action}: {e}")
+            return 0
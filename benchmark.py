@@ -0,0 +1,340 @@
+"""Latency and throughput benchmarks for TaskManager and the GUI render path
+
+Seeds N tasks, then times every TaskManager operation single-threaded and
+with concurrent clients, plus display_tasks rendering when a display is
+available. Results are written as JSON and can be compared to a saved
+baseline:
+
+    python benchmark.py --sizes 10000 100000 --output results.json
+    python benchmark.py --sizes 10000 --compare results.json
+
+The MySQL backend uses its own database (task_manager_bench by default),
+whose tables are emptied before seeding. The sqlite backend runs the same
+TaskManager on the embedded engine in a temporary file.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import platform
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+WORDS = ("report review deploy fix login bug invoice meeting design update "
+         "database migrate backup refactor test release customer email budget plan").split()
+STATUSES = ('pending', 'in_progress', 'completed')
+PRIORITIES = ('low', 'medium', 'high')
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed):
+    """Latency percentiles in ms and throughput for a list of durations in seconds"""
+    ordered = sorted(samples)
+    return {
+        'count': len(ordered),
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        'ops_per_sec': round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def time_calls(fn, iterations):
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        begin = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - begin)
+    return summarize(samples, time.perf_counter() - started)
+
+
+def time_concurrent(operations, clients, duration):
+    """Run a random mix of operations from `clients` threads for `duration` seconds"""
+    deadline = time.perf_counter() + duration
+    samples = []
+    lock = threading.Lock()
+
+    def client(seed):
+        rng = random.Random(seed)
+        local = []
+        while time.perf_counter() < deadline:
+            fn = rng.choice(operations)
+            begin = time.perf_counter()
+            fn()
+            local.append(time.perf_counter() - begin)
+        with lock:
+            samples.extend(local)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(client, range(clients)))
+    return summarize(samples, time.perf_counter() - started)
+
+
+def random_task(rng):
+    today = datetime.date.today()
+    return {
+        'title': " ".join(rng.choice(WORDS) for _ in range(3)),
+        'description': " ".join(rng.choice(WORDS) for _ in range(12)),
+        'status': rng.choice(STATUSES),
+        'priority': rng.choice(PRIORITIES),
+        'due_date': (today + datetime.timedelta(days=rng.randint(-60, 60))).isoformat(),
+    }
+
+
+class AsyncManagerThread:
+    """Synchronous facade over AsyncTaskManager, running its loop on a thread"""
+
+    def __init__(self, manager, loop):
+        self._manager = manager
+        self._loop = loop
+
+    @classmethod
+    def start(cls, **kwargs):
+        from async_task_manager import AsyncTaskManager
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+        manager = asyncio.run_coroutine_threadsafe(
+            AsyncTaskManager.connect('sqlite', **kwargs), loop).result()
+        return cls(manager, loop)
+
+    def __getattr__(self, name):
+        method = getattr(self._manager, name)
+
+        def call(*args, **kwargs):
+            return asyncio.run_coroutine_threadsafe(method(*args, **kwargs), self._loop).result()
+        return call
+
+
+def open_backend(backend, database):
+    """Return (manager, reset) for an empty benchmark database"""
+    if backend == 'mysql':
+        from config import DB_CONFIG, STARTUP
+        DB_CONFIG['database'] = database
+        # Keep the app's own schema marker pointing at its database
+        STARTUP['schema_marker'] = os.path.join(tempfile.gettempdir(),
+                                                f"task_manager_bench_{database}_schema.json")
+        from database import initialize_database, pooled_connection
+        from task_manager import TaskManager
+        initialize_database()
+
+        def reset():
+            with pooled_connection() as connection:
+                cursor = connection.cursor()
+                for table in ('tasks', 'task_stats', 'task_due_stats', 'task_changes',
+                              'tasks_archive', 'task_archive_stats'):
+                    cursor.execute(f"TRUNCATE TABLE {table}")
+                cursor.close()
+        return TaskManager(), reset
+    if backend == 'sqlite':
+        from storage import SQLiteBackend
+        from task_manager import TaskManager
+        path = os.path.join(tempfile.mkdtemp(prefix='task_manager_bench'), f"{database}.db")
+        manager = TaskManager(SQLiteBackend(path))
+        manager.initialize()
+
+        def reset():
+            with manager.backend.connection() as connection:
+                cursor = connection.cursor()
+                for table in ('tasks', 'task_stats', 'task_due_stats', 'task_changes',
+                              'tasks_archive', 'task_archive_stats'):
+                    cursor.execute(f"DELETE FROM {table}")
+                connection.commit()
+                cursor.close()
+        return manager, reset
+    manager = AsyncManagerThread.start()
+
+    def reset():
+        ids = [task['id'] for task in manager.view_all_tasks()]
+        manager.delete_many(ids)
+    return manager, reset
+
+
+def statistics_call(manager):
+    # Bypass TaskManager's snapshot cache so the counters are really read
+    try:
+        manager.get_statistics(use_cache=False)
+    except TypeError:
+        manager.get_statistics()
+
+
+def bench_operations(manager, ids, iterations, rng):
+    """Single-client timings; updates and deletes target ids sampled from `ids`
+
+    Deleted ids are removed from `ids`, so later runs never time misses.
+    """
+    size = len(ids)
+    results = {}
+    first_page, cursor = manager.get_tasks_page()
+    results['get_tasks_page'] = time_calls(lambda: manager.get_tasks_page(), iterations)
+    if cursor is not None:
+        results['get_tasks_page_next'] = time_calls(
+            lambda: manager.get_tasks_page(after=cursor), iterations)
+    results['filter_by_status'] = time_calls(
+        lambda: manager.filter_by_status(rng.choice(STATUSES)), max(1, iterations // 10))
+    if hasattr(manager, 'query_tasks'):
+        from task_manager import TaskQuery
+        results['query_tasks_sorted_filtered'] = time_calls(
+            lambda: manager.query_tasks(TaskQuery(status=rng.choice(STATUSES), order_by='due_date')),
+            iterations)
+    results['search_tasks'] = time_calls(
+        lambda: manager.search_tasks(" ".join(rng.sample(WORDS, 2))), iterations)
+    results['get_statistics'] = time_calls(lambda: statistics_call(manager), iterations)
+    results['view_all_tasks'] = time_calls(manager.view_all_tasks, 1 if size > 100000 else 3)
+    results['add_task'] = time_calls(
+        lambda: manager.add_task(**{k: v for k, v in random_task(rng).items() if k != 'status'}),
+        iterations)
+    results['update_task_status'] = time_calls(
+        lambda: manager.update_task_status(rng.choice(ids), rng.choice(STATUSES)), iterations)
+    results['delete_task'] = time_calls(
+        lambda: manager.delete_task(ids.pop(rng.randrange(len(ids)))), min(iterations, size))
+    return results
+
+
+def bench_concurrent(manager, ids, clients, duration, rng):
+    operations = [
+        lambda: manager.get_tasks_page(),
+        lambda: manager.search_tasks(rng.choice(WORDS)),
+        lambda: statistics_call(manager),
+        lambda: manager.update_task_status(rng.choice(ids), rng.choice(STATUSES)),
+    ]
+    return time_concurrent(operations, clients, duration)
+
+
+def bench_render(manager, iterations):
+    """Time display_tasks into a real (possibly virtual) display, if one exists"""
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"Skipping render benchmarks: {e}", file=sys.stderr)
+        return {}
+    root.withdraw()
+    from main import TaskManagerGUI
+    gui = TaskManagerGUI(root, connect=False)
+    tasks, _ = manager.get_tasks_page()
+    changed = [dict(task) for task in tasks]
+
+    def full_render():
+        gui.tree.delete(*gui.tree.get_children())
+        gui.rendered.clear()
+        gui.display_tasks(tasks)
+        root.update_idletasks()
+
+    def one_row_changed():
+        row = changed[0]
+        row['status'] = 'completed' if row['status'] != 'completed' else 'pending'
+        gui.display_tasks(changed)
+        root.update_idletasks()
+
+    results = {
+        'display_tasks_full': time_calls(full_render, iterations),
+        'display_tasks_one_change': time_calls(one_row_changed, iterations),
+    }
+    gui.on_close()
+    return results
+
+
+def run(args):
+    manager, reset = open_backend(args.backend, args.database)
+    rng = random.Random(args.seed)
+    report = {
+        'meta': {
+            'backend': args.backend,
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'iterations': args.iterations,
+            'clients': args.clients,
+        },
+        'results': {},
+    }
+    for size in args.sizes:
+        print(f"Seeding {size} tasks...", file=sys.stderr)
+        reset()
+        started = time.perf_counter()
+        manager.add_tasks(random_task(rng) for _ in range(size))
+        seed_seconds = time.perf_counter() - started
+        results = {'seed': {'count': size, 'ops_per_sec': round(size / seed_seconds, 1)}}
+        # Ids keep counting up across resets, so sample the rows just seeded
+        ids = [task['id'] for task in manager.view_all_tasks()]
+        print(f"Running single-client benchmarks at {size}...", file=sys.stderr)
+        results.update(bench_operations(manager, ids, args.iterations, rng))
+        if args.clients > 1:
+            print(f"Running {args.clients} concurrent clients...", file=sys.stderr)
+            results[f'concurrent_mix_{args.clients}_clients'] = bench_concurrent(
+                manager, ids, args.clients, args.duration, rng)
+        if not args.no_render:
+            results.update(bench_render(manager, args.iterations))
+        report['results'][str(size)] = results
+    return report
+
+
+def compare(report, baseline, threshold):
+    """Print per-operation changes against a baseline; returns regression count"""
+    regressions = 0
+    for size, results in report['results'].items():
+        base_results = baseline.get('results', {}).get(size)
+        if not base_results:
+            print(f"[{size}] no baseline")
+            continue
+        for name, current in results.items():
+            base = base_results.get(name)
+            if not base or 'p50_ms' not in current or not base.get('p50_ms'):
+                continue
+            change = (current['p50_ms'] - base['p50_ms']) / base['p50_ms']
+            flag = ""
+            if change > threshold:
+                flag = "  REGRESSION"
+                regressions += 1
+            print(f"[{size}] {name:<32} p50 {base['p50_ms']:>10.3f} -> {current['p50_ms']:>10.3f} ms "
+                  f"({change:+.1%})  p99 {base['p99_ms']:.3f} -> {current['p99_ms']:.3f} ms{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark TaskManager and the GUI render path")
+    parser.add_argument('--backend', choices=('mysql', 'sqlite', 'async-sqlite'), default='mysql')
+    parser.add_argument('--database', default='task_manager_bench',
+                        help="MySQL database to seed (its tables are emptied), or SQLite file name")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000])
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5.0,
+                        help="seconds per concurrent scenario")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--no-render', action='store_true', help="skip the Tk benchmarks")
+    parser.add_argument('--output', help="write results JSON here")
+    parser.add_argument('--compare', help="baseline results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="p50 slowdown that counts as a regression (default 10%%)")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Read-through query cache in front of TaskManager"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from config import CACHE_CONFIG
+from task_manager import ReadError
+
+
+def estimate_size(value):
+    """Rough deep size in bytes of a query result (lists, dicts, scalars)"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.items():
+            size += sys.getsizeof(key) + estimate_size(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            size += estimate_size(item)
+    return size
+
+
+def is_failed_read(value):
+    """True for what a TaskManager read returns when the query failed"""
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    return value is None or isinstance(value, ReadError)
+
+
+class LRUTTLCache:
+    """Least-recently-used cache with per-entry expiry and a memory cap"""
+
+    def __init__(self, max_entries=CACHE_CONFIG['max_entries'], ttl=CACHE_CONFIG['ttl'],
+                 max_bytes=CACHE_CONFIG['max_bytes']):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Return (True, value) on a fresh hit, otherwise (False, None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            expires_at, size, value = entry
+            if time.monotonic() >= expires_at:
+                self._drop(key)
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def put(self, key, value):
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+class CachedTaskManager:
+    """Wraps a TaskManager, serving repeated reads from an LRU+TTL cache
+
+    Every cache key carries the table version at the time the query started.
+    Writes made through this wrapper bump the version, so a result read
+    before the write can never be served afterwards. Changes made by other
+    clients show up once get_changes() reports them, or at the latest once
+    entries expire after the TTL. Cached results are
+    shared, so callers must not mutate them.
+    """
+
+    READ_METHODS = ('view_all_tasks', 'get_tasks_page', 'query_tasks', 'search_tasks',
+                    'filter_by_status', 'get_statistics')
+    WRITE_METHODS = ('add_task', 'add_tasks', 'bulk_load', 'update_task_status',
+                     'update_status_many', 'delete_task', 'delete_many', 'archive_completed')
+
+    def __init__(self, manager, cache=None):
+        self.manager = manager
+        self.cache = cache if cache is not None else LRUTTLCache()
+        self.version = 0
+        self._version_lock = threading.Lock()
+
+    def invalidate(self):
+        """Bump the table version and drop every cached result"""
+        with self._version_lock:
+            self.version += 1
+        self.cache.clear()
+
+    def get_changes(self, *args, **kwargs):
+        """Read the change feed; changes from any client make cached results stale"""
+        changes, last_id = self.manager.get_changes(*args, **kwargs)
+        if changes is None or changes:
+            self.invalidate()
+        return changes, last_id
+
+    def cache_stats(self):
+        stats = self.cache.stats()
+        stats['version'] = self.version
+        return stats
+
+    def __getattr__(self, name):
+        attribute = getattr(self.manager, name)
+        if name in self.READ_METHODS:
+            return self._cached(name, attribute)
+        if name in self.WRITE_METHODS:
+            return self._invalidating(attribute)
+        return attribute
+
+    def _cached(self, name, method):
+        def read(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())), self.version)
+            hit, value = self.cache.get(key)
+            if hit:
+                return value
+            value = method(*args, **kwargs)
+            # Cache empty results too, but never pin a failure
+            if not is_failed_read(value):
+                self.cache.put(key, value)
+            return value
+        return read
+
+    def _invalidating(self, method):
+        def write(*args, **kwargs):
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.invalidate()
+        return write
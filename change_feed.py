@@ -0,0 +1,112 @@
+"""Live sync: poll the task_changes feed and hand deltas to the GUI"""
+import time
+from config import CHANGE_FEED
+
+# Upper bound on id ranges opened, and re-checked per poll
+MAX_GAPS = 50
+
+
+class ChangeFeed:
+    """Polls TaskManager.get_changes() on a BackgroundExecutor
+
+    on_changes(changes) runs on the Tk thread for every non-empty batch;
+    on_resync() runs when the feed was pruned past the last change seen and
+    only a full reload can catch up. Concurrent transactions can commit
+    change ids out of order, so ids skipped over are re-checked for
+    CHANGE_FEED['gap_grace'] seconds before they are given up on; a gap
+    shrinks as its late changes are delivered.
+    """
+
+    def __init__(self, root, executor, manager, on_changes, on_resync,
+                 interval_ms=CHANGE_FEED['poll_ms'], batch_size=CHANGE_FEED['batch_size']):
+        self.root = root
+        self.executor = executor
+        self.manager = manager
+        self.on_changes = on_changes
+        self.on_resync = on_resync
+        self.interval_ms = interval_ms
+        self.batch_size = batch_size
+        self.last_id = None
+        self._gaps = []  # [first, last, expires_at], ascending and disjoint
+        self._job = None
+
+    @property
+    def running(self):
+        return self.last_id is not None
+
+    def start(self, last_id):
+        """Begin polling for changes after change id last_id"""
+        self.last_id = last_id
+        self._schedule(self.interval_ms)
+
+    def stop(self):
+        self.last_id = None
+        if self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+        self.executor.cancel("change_feed")
+
+    def _schedule(self, delay):
+        self._job = self.root.after(delay, self._poll)
+
+    def _poll(self):
+        self._job = None
+        if not self.running:
+            return
+        now = time.monotonic()
+        self._gaps = [gap for gap in self._gaps if gap[2] > now]
+        self.executor.submit(self.manager.get_changes, self.last_id, self.batch_size,
+                             [(first, last) for first, last, _ in self._gaps[:MAX_GAPS]],
+                             on_success=self._on_result, on_error=self._on_error,
+                             key="change_feed", quiet=True)
+
+    def _on_result(self, result):
+        if not self.running:
+            return
+        changes, last_id = result
+        if changes is None:
+            self._gaps.clear()
+            self.last_id = last_id
+            self.on_resync()
+            self._schedule(self.interval_ms)
+            return
+        fresh = []
+        late = 0
+        previous = self.last_id
+        for change in changes:
+            change_id = change['change_id']
+            if change_id <= self.last_id:
+                # Late commit inside a known gap
+                if not self._close_gap(change_id):
+                    continue
+                late += 1
+            else:
+                if change_id > previous + 1 and len(self._gaps) < MAX_GAPS:
+                    self._gaps.append([previous + 1, change_id - 1,
+                                       time.monotonic() + CHANGE_FEED['gap_grace']])
+                previous = change_id
+            fresh.append(change)
+        self.last_id = last_id
+        if fresh:
+            self.on_changes(fresh)
+        # A full batch of new or of late changes means more are waiting
+        more = max(len(fresh) - late, late) >= self.batch_size
+        self._schedule(0 if more else self.interval_ms)
+
+    def _close_gap(self, change_id):
+        """Take a delivered id out of its gap; False if no gap holds it"""
+        for index, (first, last, expires_at) in enumerate(self._gaps):
+            if first <= change_id <= last:
+                pieces = []
+                if first < change_id:
+                    pieces.append([first, change_id - 1, expires_at])
+                if change_id < last:
+                    pieces.append([change_id + 1, last, expires_at])
+                self._gaps[index:index + 1] = pieces
+                return True
+        return False
+
+    def _on_error(self, e):
+        print(f"Change feed poll failed: {e}")
+        if self.running:
+            self._schedule(self.interval_ms * 5)
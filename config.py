@@ -6,3 +6,75 @@ DB_CONFIG = {
     'password': '0202',
     'database': 'task_manager'
 }
+
+# Storage backend: 'mysql' (DB_CONFIG server) or 'sqlite' (embedded, single user)
+STORAGE = {
+    'backend': 'mysql',
+    'sqlite_path': 'task_manager.db',
+    'sqlite_busy_timeout': 5,          # seconds a writer waits for the lock
+    'sqlite_cached_statements': 256    # prepared statements kept per connection
+}
+
+# Startup: records the migrated schema version so launches skip the DDL
+STARTUP = {
+    'schema_marker': '.task_manager_schema.json'
+}
+
+# Connection pool settings (mysql-connector caps pool_size at 32)
+POOL_CONFIG = {
+    'pool_name': 'task_manager_pool',
+    'pool_size': 5,
+    'checkout_timeout': 10  # seconds to wait for a free connection
+}
+
+# Task list paging
+PAGE_SIZE = 200          # rows per Treeview page
+STREAM_BATCH_SIZE = 1000  # rows per batch when streaming the whole table
+
+# Search
+SEARCH_LIMIT = 200      # max rows returned by a search
+FT_MIN_TOKEN_SIZE = 3   # keep in sync with the server's innodb_ft_min_token_size
+
+# Seconds a statistics snapshot is reused before re-reading the counters
+STATS_CACHE_TTL = 5
+
+# Rows per statement and per transaction for bulk writes
+BULK_CHUNK_SIZE = 1000
+
+# Query result cache in front of TaskManager
+CACHE_CONFIG = {
+    'max_entries': 256,
+    'ttl': 30,                      # seconds; bounds staleness from other clients
+    'max_bytes': 64 * 1024 * 1024
+}
+
+# Live sync: each window polls the task_changes feed for other clients' writes
+CHANGE_FEED = {
+    'enabled': True,
+    'poll_ms': 1000,
+    'batch_size': 500,        # changes fetched per poll
+    'gap_grace': 10,          # seconds to wait for ids committed out of order
+    'retention_hours': 24     # older changes are pruned at startup
+}
+
+# Archival of old completed tasks into tasks_archive, run in the background
+ARCHIVE = {
+    'enabled': True,
+    'age_days': 90,          # completed tasks created longer ago are archived
+    'batch_size': 500,       # rows moved per transaction
+    'max_batches': 200,      # per run, so one run stays short
+    'pause': 0.05,           # seconds between batches, to let other writers in
+    'interval_minutes': 60
+}
+
+# Query metrics and GUI profiling (see instrumentation.py)
+INSTRUMENTATION = {
+    'enabled': False,
+    'slow_query_ms': 200,        # log queries slower than this
+    'profile_gui': False,        # sample the Tk event loop from startup
+    'profile_interval_ms': 5,
+    # Run by metrics.flush() when the window closes: 'json_log', 'prometheus_file'
+    'exporters': ('json_log',),
+    'prometheus_path': 'task_manager_metrics.prom',
+    'log_path': None             # metrics and slow-query JSON lines; None logs to stderr
+}
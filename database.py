@@ -1,89 +1,198 @@
 """Database setup and connection management"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
 import mysql.connector
-from mysql.connector import Error
-from config import DB_CONFIG
+from mysql.connector import Error, errorcode
+from mysql.connector.errors import PoolError
+from mysql.connector.pooling import MySQLConnectionPool
+from config import DB_CONFIG, POOL_CONFIG, STARTUP
+from migrations import LATEST_VERSION, run_migrations
+from instrumentation import InstrumentedConnection, metrics
 
+_pool = None
+_pool_opened = 0  # connections the pool has opened so far
+_pool_lock = threading.Lock()
 
-def create_database():
-    """Create database if it doesn't exist"""
+
+def get_pool():
+    """Get the shared connection pool, creating it on first use
+
+    Only one connection is opened up front, so startup pays a single
+    handshake; _borrow() opens the rest as concurrent checkouts need them,
+    up to POOL_CONFIG['pool_size'].
+    """
+    global _pool, _pool_opened
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # Without connection arguments the constructor opens nothing
+                pool = MySQLConnectionPool(
+                    pool_name=POOL_CONFIG['pool_name'],
+                    pool_size=POOL_CONFIG['pool_size'],
+                    pool_reset_session=True
+                )
+                pool.set_config(**DB_CONFIG)
+                pool.add_connection()
+                _pool, _pool_opened = pool, 1
+    return _pool
+
+
+def _grow(pool):
+    """Open one more pooled connection; False once pool_size are open"""
+    global _pool_opened
+    with _pool_lock:
+        if pool is not _pool or _pool_opened >= POOL_CONFIG['pool_size']:
+            return False
+        _pool_opened += 1
     try:
-        # Connect without specifying database
-        connection = mysql.connector.connect(
-            host=DB_CONFIG['host'],
-            user=DB_CONFIG['user'],
-            password=DB_CONFIG['password']
-        )
-        cursor = connection.cursor()
-        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {DB_CONFIG['database']}")
-        print(f"Database '{DB_CONFIG['database']}' is ready")
-        cursor.close()
-        connection.close()
-        return True
-    except Error as e:
-        print(f"Error creating database: {e}")
+        pool.add_connection()
+    except Error:
+        with _pool_lock:
+            _pool_opened -= 1
         raise
+    return True
+
+
+def close_pool():
+    """Close every idle connection held by the pool"""
+    global _pool, _pool_opened
+    with _pool_lock:
+        if _pool is not None:
+            _pool._remove_connections()
+            _pool, _pool_opened = None, 0
+
+
+def _borrow():
+    """Borrow a healthy connection, waiting while the pool is exhausted"""
+    pool = get_pool()
+    deadline = time.monotonic() + POOL_CONFIG['checkout_timeout']
+    while True:
+        try:
+            # Checkout pings the connection and reconnects it if it went stale
+            return pool.get_connection()
+        except PoolError:
+            if _grow(pool):
+                continue
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.005)
 
 
-def get_connection():
-    """Get database connection"""
+def _checkout():
+    """Borrow a connection, timing the checkout when instrumentation is on"""
+    if not metrics.enabled:
+        return _borrow()
+    started = time.perf_counter()
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        return connection
-    except Error as e:
-        print(f"Error connecting to database: {e}")
-        return None
+        connection = _borrow()
+    except Error:
+        metrics.record_acquire(time.perf_counter() - started, failed=True)
+        raise
+    metrics.record_acquire(time.perf_counter() - started)
+    return InstrumentedConnection(connection, metrics)
 
 
-def create_table():
-    """Create tasks table"""
-    connection = get_connection()
-    if connection:
+def open_local_infile_connection():
+    """Open a dedicated, unpooled connection allowed to LOAD DATA LOCAL INFILE"""
+    connection = mysql.connector.connect(allow_local_infile=True, **DB_CONFIG)
+    if metrics.enabled:
+        return InstrumentedConnection(connection, metrics)
+    return connection
+
+
+@contextmanager
+def pooled_connection():
+    """Borrow a pooled connection and always hand it back, even on errors"""
+    connection = _checkout()
+    try:
+        yield connection
+    except Exception:
         try:
-            cursor = connection.cursor()
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS tasks (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    title VARCHAR(255) NOT NULL,
-                    description TEXT,
-                    status ENUM('pending', 'in_progress', 'completed') DEFAULT 'pending',
-                    priority ENUM('low', 'medium', 'high') DEFAULT 'medium',
-                    due_date DATE,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            connection.commit()
-            print("Table 'tasks' is ready")
-            cursor.close()
-            connection.close()
-            return True
-        except Error as e:
-            print(f"Error creating table: {e}")
-            raise
-    else:
-        raise Exception("Could not connect to database")
+            connection.rollback()
+        except Error:
+            pass
+        raise
+    finally:
+        connection.close()
+
+
+def _marker_key():
+    return {'host': DB_CONFIG['host'], 'port': DB_CONFIG.get('port', 3306),
+            'database': DB_CONFIG['database']}
+
+
+def read_schema_marker():
+    """Schema version recorded by the last successful bootstrap, or None"""
+    try:
+        with open(STARTUP['schema_marker'], encoding='utf-8') as f:
+            marker = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if marker.get('server') != _marker_key():
+        return None
+    return marker.get('version')
+
+
+def write_schema_marker(version):
+    try:
+        with open(STARTUP['schema_marker'], 'w', encoding='utf-8') as f:
+            json.dump({'server': _marker_key(), 'version': version}, f)
+    except OSError as e:
+        print(f"Could not write schema marker: {e}")
+
+
+def clear_schema_marker():
+    try:
+        os.remove(STARTUP['schema_marker'])
+    except OSError:
+        pass
 
 
-def test_connection():
-    """Test database connection"""
+def bootstrap_schema():
+    """Create the database and apply pending migrations on one connection"""
     try:
-        # First test basic MySQL connection
         connection = mysql.connector.connect(
             host=DB_CONFIG['host'],
             user=DB_CONFIG['user'],
             password=DB_CONFIG['password']
         )
-        connection.close()
-        return True
     except Error as e:
         raise Exception(f"MySQL connection failed: {e}")
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS {DB_CONFIG['database']}")
+        cursor.close()
+        connection.database = DB_CONFIG['database']
+        applied = run_migrations(connection)
+        print(f"Schema is at version {LATEST_VERSION}"
+              + (f" (applied {applied})" if applied else ""))
+    finally:
+        connection.close()
+    write_schema_marker(LATEST_VERSION)
 
 
-def initialize_database():
-    """Initialize database and tables"""
-    print("Testing MySQL connection...")
-    test_connection()
-    print("Creating database...")
-    create_database()
-    print("Creating table...")
-    create_table()
+def initialize_database(force=False):
+    """Initialize database and tables, then open the connection pool
+
+    When the schema marker says this server and database were already
+    migrated to LATEST_VERSION, no DDL runs at all: startup only opens the
+    pool. Delete the marker file (STARTUP['schema_marker']) or pass
+    force=True after changing the schema by hand.
+    """
+    if not force and read_schema_marker() == LATEST_VERSION:
+        try:
+            get_pool()
+            print(f"Schema is at version {LATEST_VERSION} (cached)")
+            return
+        except Error as e:
+            if e.errno != errorcode.ER_BAD_DB_ERROR:
+                raise
+            # The database was dropped since the marker was written
+            clear_schema_marker()
+    print("Bootstrapping database...")
+    bootstrap_schema()
+    get_pool()
     print("Database initialization complete!")
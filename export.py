@@ -0,0 +1,169 @@
+"""Streaming export of tasks to CSV, JSON Lines and Parquet
+
+Rows are written batch by batch as they arrive from an unbuffered cursor,
+so memory use stays constant regardless of table size. Can be run headless:
+
+    python export.py --output tasks.csv.gz
+    python export.py --output tasks.parquet --compression zstd
+"""
+import argparse
+import csv
+import datetime
+import gzip
+import io
+import json
+import sys
+
+FIELDS = ('id', 'title', 'description', 'status', 'priority', 'due_date', 'created_at')
+FORMATS = ('csv', 'jsonl', 'parquet')
+COMPRESSIONS = ('gzip', 'zstd')
+EXTENSIONS = {'.csv': 'csv', '.jsonl': 'jsonl', '.parquet': 'parquet'}
+COMPRESSION_EXTENSIONS = {'.gz': 'gzip', '.zst': 'zstd'}
+
+
+def guess_format(path):
+    """Infer (format, compression) from a file name like tasks.csv.gz"""
+    name = path.lower()
+    compression = None
+    for suffix, codec in COMPRESSION_EXTENSIONS.items():
+        if name.endswith(suffix):
+            compression = codec
+            name = name[:-len(suffix)]
+    for suffix, fmt in EXTENSIONS.items():
+        if name.endswith(suffix):
+            return fmt, compression
+    return 'csv', compression
+
+
+def open_output(path, compression=None):
+    """Open a binary output stream, optionally compressing on the fly"""
+    if compression is None:
+        return open(path, 'wb')
+    if compression == 'gzip':
+        return gzip.open(path, 'wb')
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("zstd compression requires the 'zstandard' package")
+        return zstandard.ZstdCompressor().stream_writer(open(path, 'wb'))
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+def _write_csv(batches, stream, progress):
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    writer = csv.writer(text)
+    writer.writerow(FIELDS)
+    written = 0
+    for batch in batches:
+        writer.writerows([task.get(field) for field in FIELDS] for task in batch)
+        written += len(batch)
+        if progress:
+            progress(written)
+    text.flush()
+    text.detach()
+    return written
+
+
+def _write_jsonl(batches, stream, progress):
+    written = 0
+    for batch in batches:
+        lines = "".join(
+            json.dumps({field: task.get(field) for field in FIELDS}, default=str) + "\n"
+            for task in batch
+        )
+        stream.write(lines.encode('utf-8'))
+        written += len(batch)
+        if progress:
+            progress(written)
+    return written
+
+
+def _as_date(value):
+    if isinstance(value, str):
+        return datetime.date.fromisoformat(value)
+    return value
+
+
+def _as_datetime(value):
+    if isinstance(value, str):
+        return datetime.datetime.fromisoformat(value)
+    return value
+
+
+def _write_parquet(batches, path, compression, progress):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export requires the 'pyarrow' package")
+    schema = pa.schema([
+        ('id', pa.int64()),
+        ('title', pa.string()),
+        ('description', pa.string()),
+        ('status', pa.string()),
+        ('priority', pa.string()),
+        ('due_date', pa.date32()),
+        ('created_at', pa.timestamp('s')),
+    ])
+    written = 0
+    # Parquet compresses per column chunk, so the codec goes to the writer
+    with pq.ParquetWriter(path, schema, compression=compression or 'snappy') as writer:
+        for batch in batches:
+            columns = {field: [task.get(field) for task in batch] for field in FIELDS}
+            columns['due_date'] = [_as_date(value) for value in columns['due_date']]
+            columns['created_at'] = [_as_datetime(value) for value in columns['created_at']]
+            # One row group per batch keeps memory bounded by the batch size
+            writer.write_table(pa.table(columns, schema=schema))
+            written += len(batch)
+            if progress:
+                progress(written)
+    return written
+
+
+def export_tasks(batches, path, fmt='csv', compression=None, progress=None):
+    """Write task batches to path; returns the number of rows written
+
+    `batches` yields lists of task dicts, e.g. TaskManager.iter_task_batches().
+    `progress(rows_written)` is called after every batch.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt == 'parquet':
+        return _write_parquet(batches, path, compression, progress)
+    with open_output(path, compression) as stream:
+        if fmt == 'csv':
+            return _write_csv(batches, stream, progress)
+        return _write_jsonl(batches, stream, progress)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export all tasks")
+    parser.add_argument('--output', '-o', required=True,
+                        help="output file; format and compression are inferred from the name")
+    parser.add_argument('--format', choices=FORMATS, help="override the inferred format")
+    parser.add_argument('--compression', choices=COMPRESSIONS,
+                        help="override the inferred compression")
+    parser.add_argument('--batch-size', type=int, default=None)
+    parser.add_argument('--include-archived', action='store_true',
+                        help="also export tasks moved to tasks_archive")
+    args = parser.parse_args(argv)
+
+    from task_manager import TaskManager
+    fmt, compression = guess_format(args.output)
+    fmt = args.format or fmt
+    compression = args.compression or compression
+
+    manager = TaskManager()
+    options = {'include_archived': args.include_archived}
+    if args.batch_size:
+        options['batch_size'] = args.batch_size
+    batches = manager.iter_task_batches(**options)
+    written = export_tasks(batches, args.output, fmt, compression,
+                           progress=lambda rows: print(f"\r{rows} tasks exported",
+                                                       end="", file=sys.stderr))
+    print(f"\nTasks exported to {args.output} ({written} rows)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""Bulk import of tasks from CSV or JSON Lines files
+
+Files are streamed in chunks of records. Each chunk is parsed and validated
+column by column, on a process pool when the file is large, and then loaded
+with LOAD DATA LOCAL INFILE or multi-row INSERTs. Bad rows are reported,
+not fatal:
+
+    python importer.py tasks.csv
+    python importer.py tasks.jsonl.gz --method insert --rejects bad_rows.txt
+"""
+import argparse
+import csv
+import datetime
+import gzip
+import io
+import json
+import multiprocessing
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from task_manager import STATUSES, PRIORITIES
+
+FIELDS = ('title', 'description', 'status', 'priority', 'due_date')
+CHUNK_RECORDS = 20000          # records per parse/validate/load chunk
+PARALLEL_THRESHOLD = 32 * 1024 * 1024  # bytes; smaller files are parsed in-process
+MAX_REPORTED_ERRORS = 1000
+DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def detect_format(path):
+    """Return ('csv' | 'jsonl', gzipped) from the file name"""
+    name = path.lower()
+    gzipped = name.endswith('.gz')
+    if gzipped:
+        name = name[:-3]
+    return ('jsonl' if name.endswith(('.jsonl', '.ndjson', '.json')) else 'csv'), gzipped
+
+
+def open_input(path, gzipped):
+    raw = gzip.open(path, 'rb') if gzipped else open(path, 'rb')
+    return io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+
+
+def read_chunks(stream, fmt, chunk_records=CHUNK_RECORDS):
+    """Yield (first_line_number, header, lines) chunks of raw record text
+
+    CSV chunks only end where the quote count is balanced, so quoted fields
+    with embedded newlines are never split across chunks.
+    """
+    header = None
+    if fmt == 'csv':
+        header_line = stream.readline()
+        header = next(csv.reader([header_line]), [])
+        line_number = 2
+    else:
+        line_number = 1
+    lines = []
+    first_line = line_number
+    records = 0
+    open_quote = False
+    for line in stream:
+        lines.append(line)
+        line_number += 1
+        if fmt == 'csv' and line.count('"') % 2:
+            open_quote = not open_quote
+        if not open_quote:
+            records += 1
+            if records >= chunk_records:
+                yield first_line, header, lines
+                lines, records, first_line = [], 0, line_number
+    if lines:
+        yield first_line, header, lines
+
+
+def parse_chunk(fmt, header, lines, first_line):
+    """Parse and validate one chunk; returns (valid task dicts, [(line, reason)])"""
+    records, line_numbers, errors = [], [], []
+    if fmt == 'csv':
+        reader = csv.reader(lines)
+        columns = [name.strip().lower() for name in header]
+        for values in reader:
+            line = first_line + reader.line_num - 1
+            if not any(values):
+                continue
+            if len(values) != len(columns):
+                errors.append((line, f"expected {len(columns)} fields, got {len(values)}"))
+                continue
+            records.append(dict(zip(columns, values)))
+            line_numbers.append(line)
+    else:
+        for offset, text in enumerate(lines):
+            if not text.strip():
+                continue
+            try:
+                record = json.loads(text)
+            except ValueError as e:
+                errors.append((first_line + offset, f"invalid JSON: {e}"))
+                continue
+            if not isinstance(record, dict):
+                errors.append((first_line + offset, "expected a JSON object"))
+                continue
+            records.append(record)
+            line_numbers.append(first_line + offset)
+    valid, invalid = validate_records(records)
+    errors.extend((line_numbers[index], reason) for index, reason in invalid)
+    errors.sort()
+    return valid, errors
+
+
+def validate_records(records):
+    """Validate a batch column by column; returns (valid dicts, [(index, reason)])"""
+    columns = {field: [_clean(record.get(field)) for record in records] for field in FIELDS}
+    columns['status'] = [value or 'pending' for value in columns['status']]
+    columns['priority'] = [value or 'medium' for value in columns['priority']]
+    problems = {}
+
+    def flag(mask, reason):
+        for index, bad in enumerate(mask):
+            if bad and index not in problems:
+                problems[index] = reason
+
+    flag([not title for title in columns['title']], "title is required")
+    flag([title is not None and len(title) > 255 for title in columns['title']],
+         "title longer than 255 characters")
+    flag([status not in STATUSES for status in columns['status']], "invalid status")
+    flag([priority not in PRIORITIES for priority in columns['priority']], "invalid priority")
+    flag([due is not None and not _valid_date(due) for due in columns['due_date']],
+         "due_date must be YYYY-MM-DD")
+
+    valid = [
+        {field: columns[field][index] for field in FIELDS}
+        for index in range(len(records)) if index not in problems
+    ]
+    invalid = sorted(problems.items())
+    return valid, invalid
+
+
+def _clean(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _valid_date(value):
+    if not DATE_RE.match(value):
+        return False
+    try:
+        datetime.date.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _parsed_chunks(path, workers):
+    fmt, gzipped = detect_format(path)
+    with open_input(path, gzipped) as stream:
+        chunks = read_chunks(stream, fmt)
+        if workers <= 1:
+            for first_line, header, lines in chunks:
+                yield first_line, len(lines), parse_chunk(fmt, header, lines, first_line)
+            return
+        # spawn rather than fork: the caller may be a threaded Tk process
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            # Keep a bounded number of chunks in flight so memory stays flat
+            in_flight = []
+            for first_line, header, lines in chunks:
+                in_flight.append((first_line, len(lines),
+                                  pool.submit(parse_chunk, fmt, header, lines, first_line)))
+                if len(in_flight) >= workers * 2:
+                    first_line, count, future = in_flight.pop(0)
+                    yield first_line, count, future.result()
+            for first_line, count, future in in_flight:
+                yield first_line, count, future.result()
+
+
+def import_tasks(manager, path, method='load-data', workers=None, progress=None):
+    """Import a CSV or JSONL file; returns a report dict
+
+    The report has 'loaded', 'rejected' and 'errors', a list of
+    (line_number, reason) capped at MAX_REPORTED_ERRORS entries.
+    `method` is 'load-data' (LOAD DATA LOCAL INFILE) or 'insert'.
+    `progress(loaded, rejected)` is called after every chunk. Rows of a
+    chunk the database did not store count as rejected, with one error
+    entry for the chunk's line range.
+    """
+    if workers is None:
+        large = os.path.getsize(path) >= PARALLEL_THRESHOLD
+        workers = (os.cpu_count() or 1) if large else 1
+    load = manager.bulk_load if method == 'load-data' else manager.add_tasks
+    report = {'loaded': 0, 'rejected': 0, 'errors': []}
+    for first_line, line_count, (valid, errors) in _parsed_chunks(path, workers):
+        report['rejected'] += len(errors)
+        if valid:
+            loaded = load(valid)
+            report['loaded'] += loaded
+            missing = len(valid) - loaded
+            if missing:
+                report['rejected'] += missing
+                reason = manager.last_bulk_error or "rows were not stored"
+                last_line = first_line + line_count - 1
+                errors = [(first_line, f"lines {first_line}-{last_line}: "
+                                       f"{missing} rows not stored: {reason}")] + errors
+        room = MAX_REPORTED_ERRORS - len(report['errors'])
+        report['errors'].extend(errors[:max(room, 0)])
+        if progress:
+            progress(report['loaded'], report['rejected'])
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import tasks from CSV or JSON Lines")
+    parser.add_argument('path', help="input file (.csv, .jsonl, optionally .gz)")
+    parser.add_argument('--method', choices=('load-data', 'insert'), default='load-data')
+    parser.add_argument('--workers', type=int, default=None,
+                        help="parser processes (default: all CPUs for large files)")
+    parser.add_argument('--rejects', help="write the reported bad rows to this file")
+    args = parser.parse_args(argv)
+
+    from task_manager import TaskManager
+    report = import_tasks(TaskManager(), args.path, args.method, args.workers,
+                          progress=lambda loaded, rejected: print(
+                              f"\r{loaded} loaded, {rejected} rejected", end="", file=sys.stderr))
+    print(f"\nImported {report['loaded']} tasks, rejected {report['rejected']}", file=sys.stderr)
+    if args.rejects and report['errors']:
+        with open(args.rejects, 'w', encoding='utf-8') as f:
+            for line, reason in report['errors']:
+                f.write(f"line {line}: {reason}\n")
+    else:
+        for line, reason in report['errors'][:20]:
+            print(f"  line {line}: {reason}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+"""Query instrumentation, exporters and a sampling profiler
+
+Disabled by default (INSTRUMENTATION['enabled'] in config.py); while
+disabled, the database layer hands out plain connections and pays one
+attribute check per checkout. Enable at runtime with metrics.enable(),
+which also sets up the log handler and the exporters named in
+INSTRUMENTATION['exporters'].
+"""
+import bisect
+import collections
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from config import INSTRUMENTATION
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+slow_query_log = logging.getLogger('task_manager.slow_queries')
+metrics_log = logging.getLogger('task_manager.metrics')
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_IN_LIST_RE = re.compile(r"IN \((?:%s, )+%s\)", re.IGNORECASE)
+
+
+def normalize_query(query):
+    """Collapse whitespace and IN lists so one statement shape is one series"""
+    if isinstance(query, (bytes, bytearray)):
+        query = query.decode('utf-8', 'replace')
+    query = _WHITESPACE_RE.sub(" ", query).strip()
+    return _IN_LIST_RE.sub("IN (...)", query)[:200]
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus layout"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def cumulative(self):
+        total = 0
+        for bound, count in zip(BUCKETS + (float('inf'),), self.counts):
+            total += count
+            yield bound, total
+
+
+class QueryStats:
+    def __init__(self):
+        self.latency = Histogram()
+        self.rows = 0
+        self.errors = 0
+        self.slow = 0
+
+
+class Instrumentation:
+    """Collects per-query timings, row counts, acquire times and errors"""
+
+    def __init__(self, enabled=INSTRUMENTATION['enabled'],
+                 slow_query_ms=INSTRUMENTATION['slow_query_ms'],
+                 exporters=INSTRUMENTATION['exporters']):
+        self.enabled = False
+        self.slow_query_seconds = slow_query_ms / 1000.0
+        self.exporters = []
+        self._exporter_names = exporters
+        self._lock = threading.Lock()
+        self.reset()
+        if enabled:
+            self.enable()
+
+    def enable(self):
+        if self._exporter_names is not None:
+            configure_logging()
+            for name in self._exporter_names:
+                self.add_exporter(make_exporter(name))
+            self._exporter_names = None
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self.queries = collections.defaultdict(QueryStats)
+            self.acquire = Histogram()
+            self.acquire_errors = 0
+
+    def record_acquire(self, seconds, failed=False):
+        with self._lock:
+            if failed:
+                self.acquire_errors += 1
+            else:
+                self.acquire.observe(seconds)
+
+    def record_query(self, query, seconds, error=None):
+        key = normalize_query(query)
+        with self._lock:
+            stats = self.queries[key]
+            stats.latency.observe(seconds)
+            if error is not None:
+                stats.errors += 1
+            slow = seconds >= self.slow_query_seconds
+            if slow:
+                stats.slow += 1
+        if slow:
+            slow_query_log.warning(json.dumps({
+                'event': 'slow_query', 'query': key,
+                'duration_ms': round(seconds * 1000, 3),
+                'error': str(error) if error is not None else None,
+            }))
+        return key
+
+    def record_rows(self, key, rows):
+        with self._lock:
+            self.queries[key].rows += rows
+
+    def snapshot(self):
+        """Plain-dict view of every metric, for JSON exporters"""
+        with self._lock:
+            return {
+                'connection_acquire': _histogram_dict(self.acquire),
+                'connection_acquire_errors': self.acquire_errors,
+                'queries': {
+                    key: dict(_histogram_dict(stats.latency), rows=stats.rows,
+                              errors=stats.errors, slow=stats.slow)
+                    for key, stats in self.queries.items()
+                },
+            }
+
+    def prometheus_text(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP task_manager_query_duration_seconds Query execution time.",
+            "# TYPE task_manager_query_duration_seconds histogram",
+        ]
+        with self._lock:
+            queries = list(self.queries.items())
+            for key, stats in queries:
+                label = f'query="{_escape_label(key)}"'
+                lines.extend(_histogram_lines('task_manager_query_duration_seconds',
+                                              stats.latency, label))
+            for name, attribute, help_text in (
+                    ('task_manager_query_rows_total', 'rows', "Rows fetched or affected."),
+                    ('task_manager_query_errors_total', 'errors', "Queries that raised."),
+                    ('task_manager_slow_queries_total', 'slow', "Queries over the slow threshold.")):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for key, stats in queries:
+                    lines.append(f'{name}{{query="{_escape_label(key)}"}} {getattr(stats, attribute)}')
+            lines.append("# HELP task_manager_connection_acquire_seconds Pool checkout time.")
+            lines.append("# TYPE task_manager_connection_acquire_seconds histogram")
+            lines.extend(_histogram_lines('task_manager_connection_acquire_seconds', self.acquire))
+            lines.append("# HELP task_manager_connection_acquire_errors_total Failed checkouts.")
+            lines.append("# TYPE task_manager_connection_acquire_errors_total counter")
+            lines.append(f"task_manager_connection_acquire_errors_total {self.acquire_errors}")
+        return "\n".join(lines) + "\n"
+
+    def add_exporter(self, exporter):
+        """Register an object with an export(instrumentation) method"""
+        self.exporters.append(exporter)
+
+    def flush(self):
+        """Push current metrics to every registered exporter"""
+        for exporter in self.exporters:
+            exporter.export(self)
+
+
+class PrometheusFileExporter:
+    """Writes the Prometheus text dump to a file (e.g. for node_exporter)"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def export(self, instrumentation):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(instrumentation.prometheus_text())
+
+
+class JsonLogExporter:
+    """Emits the metrics snapshot as one structured JSON log record"""
+
+    def __init__(self, logger=metrics_log):
+        self.logger = logger
+
+    def export(self, instrumentation):
+        self.logger.info(json.dumps({'event': 'metrics', **instrumentation.snapshot()}))
+
+
+EXPORTERS = {
+    'json_log': lambda: JsonLogExporter(),
+    'prometheus_file': lambda: PrometheusFileExporter(INSTRUMENTATION['prometheus_path']),
+}
+
+
+def make_exporter(name):
+    try:
+        return EXPORTERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown exporter {name!r}; choose from {tuple(EXPORTERS)}") from None
+
+
+def configure_logging(path=INSTRUMENTATION['log_path']):
+    """Send the metrics and slow-query logs to `path`, or stderr, as JSON lines"""
+    logger = logging.getLogger('task_manager')
+    if logger.handlers:
+        return
+    handler = logging.FileHandler(path, encoding='utf-8') if path else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+class InstrumentedConnection:
+    """Connection proxy whose cursors report to the instrumentation"""
+
+    def __init__(self, connection, instrumentation):
+        self._connection = connection
+        self._instrumentation = instrumentation
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._connection.cursor(*args, **kwargs), self._instrumentation)
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+class InstrumentedCursor:
+    """Cursor proxy timing execute/executemany and counting rows"""
+
+    def __init__(self, cursor, instrumentation):
+        self._cursor = cursor
+        self._instrumentation = instrumentation
+        self._key = None
+
+    def execute(self, query, *args, **kwargs):
+        return self._timed(self._cursor.execute, query, *args, **kwargs)
+
+    def executemany(self, query, *args, **kwargs):
+        return self._timed(self._cursor.executemany, query, *args, **kwargs)
+
+    def _timed(self, method, query, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = method(query, *args, **kwargs)
+        except Exception as e:
+            self._instrumentation.record_query(query, time.perf_counter() - started, e)
+            raise
+        self._key = self._instrumentation.record_query(query, time.perf_counter() - started)
+        if self._cursor.rowcount and self._cursor.rowcount > 0 and not self._cursor.description:
+            self._instrumentation.record_rows(self._key, self._cursor.rowcount)
+        return result
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None and self._key:
+            self._instrumentation.record_rows(self._key, 1)
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        if self._key:
+            self._instrumentation.record_rows(self._key, len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        if self._key:
+            self._instrumentation.record_rows(self._key, len(rows))
+        return rows
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class SamplingProfiler:
+    """Samples one thread's stack at a fixed interval
+
+    Meant for the Tk event loop: start it on the main thread and the report
+    shows where the GUI spends its time, in collapsed-stack format that
+    flame graph tools read directly.
+    """
+
+    def __init__(self, thread_id=None, interval_ms=INSTRUMENTATION['profile_interval_ms']):
+        self.thread_id = thread_id or threading.main_thread().ident
+        self.interval = interval_ms / 1000.0
+        self.samples = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def top(self, limit=20):
+        """Most frequently sampled innermost functions as (name, samples)"""
+        leaves = collections.Counter()
+        for stack, count in self.samples.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return leaves.most_common(limit)
+
+    def write_collapsed(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _histogram_dict(histogram):
+    return {
+        'count': histogram.count,
+        'sum_seconds': round(histogram.sum, 6),
+        'buckets': {('+Inf' if bound == float('inf') else str(bound)): total
+                    for bound, total in histogram.cumulative()},
+    }
+
+
+def _histogram_lines(name, histogram, label=""):
+    prefix = label + "," if label else ""
+    for bound, total in histogram.cumulative():
+        le = '+Inf' if bound == float('inf') else repr(bound)
+        yield f'{name}_bucket{{{prefix}le="{le}"}} {total}'
+    suffix = f"{{{label}}}" if label else ""
+    yield f"{name}_sum{suffix} {histogram.sum}"
+    yield f"{name}_count{suffix} {histogram.count}"
+
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = Instrumentation()
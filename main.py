@@ -1,35 +1,198 @@
 """Main application entry point with Tkinter GUI"""
+import time
+
+STARTED = time.perf_counter()
+
+import argparse
+import json
 import tkinter as tk
-from tkinter import ttk, messagebox
-from tkcalendar import DateEntry
+from tkinter import ttk, messagebox, filedialog
 from datetime import datetime
-from database import initialize_database
-from task_manager import TaskManager
+from task_manager import TaskManager, TaskQuery
+from cache import CachedTaskManager
+from worker import BackgroundExecutor
+from change_feed import ChangeFeed
+from instrumentation import metrics, SamplingProfiler, PrometheusFileExporter
+from config import PAGE_SIZE, FT_MIN_TOKEN_SIZE, INSTRUMENTATION, CHANGE_FEED, ARCHIVE
+
+# Treeview heading -> TaskQuery sort column (Description is not indexed)
+SORTABLE_COLUMNS = {"ID": 'id', "Title": 'title', "Priority": 'priority', "Status": 'status',
+                    "Due Date": 'due_date', "Created At": 'created_at'}
 
 
 class TaskManagerGUI:
-    def __init__(self, root):
+    def __init__(self, root, measure_startup=False, connect=True):
         self.root = root
         self.root.title("Task Manager")
         self.root.geometry("900x600")
         # self.root.resizable(False, False)
         
-        # Initialize database
-        try:
-            initialize_database()
-            self.manager = TaskManager()
-        except Exception as e:
-            messagebox.showerror("Database Error", 
-                f"Failed to connect to database!\n\n"
-                f"Error: {str(e)}\n\n"
-                f"Please check your MySQL credentials in config.py")
-            root.destroy()
-            return
+        # Repeated reads (e.g. toggling filters) are served from the cache
+        self.manager = CachedTaskManager(TaskManager())
+        # All database calls run on worker threads so the window never blocks
+        self.executor = BackgroundExecutor(root, on_busy_change=self.show_loading)
+        # Other clients' writes arrive as deltas from the task_changes feed
+        self.feed = ChangeFeed(root, self.executor, self.manager,
+                               on_changes=self.apply_changes, on_resync=self.on_feed_resync)
+        self.db_ready = False
+        # Keyset cursor of the next page, None when everything is loaded
+        self.next_cursor = None
+        # Pending debounced search-as-you-type callback
+        self._search_job = None
+        self.list_future = None
+        # Treeview item id (the task id) -> (values, tags) currently shown
+        self.rendered = {}
+        # Task list order, changed by clicking a column heading
+        self.sort_column = 'created_at'
+        self.sort_descending = True
+        # Milliseconds since launch of each startup milestone, for --startup-time
+        self.startup_marks = {} if measure_startup else None
         
-        # Create GUI components
+        # Create GUI components, then initialize the database in the background
         self.create_widgets()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        # Ctrl+Shift+P toggles the event-loop profiler, Ctrl+Shift+M dumps query metrics
+        self.profiler = SamplingProfiler()
+        self.root.bind("<Control-Key-P>", lambda e: self.toggle_profiler())
+        self.root.bind("<Control-Key-M>", lambda e: self.dump_metrics())
+        if INSTRUMENTATION['profile_gui']:
+            self.profiler.start()
+        if not connect:
+            # Window only, e.g. for timing the render path in benchmark.py
+            return
+        self.stats_label.config(text="Connecting to database...")
+        self.executor.submit(self.manager.initialize,
+                             on_success=self.on_database_ready,
+                             on_error=self.on_database_error)
+    
+    def on_database_ready(self, result):
+        self.db_ready = True
+        self.mark_startup('database_ready_ms')
+        if ARCHIVE['enabled']:
+            self.archive_completed()
+        if not CHANGE_FEED['enabled']:
+            self.refresh_tasks()
+            return
+        self.executor.submit(self.manager.prune_changes, quiet=True)
+        # Read the feed position before the list, so no change falls in between
+        self.run_db(self.manager.latest_change_id, on_success=self.start_feed)
+    
+    def start_feed(self, last_id):
+        self.feed.start(last_id)
+        self.refresh_tasks()
+    
+    def archive_completed(self):
+        # Runs quietly in the background; the feed reports the moved rows
+        self.executor.submit(self.manager.archive_completed, quiet=True)
+        self.root.after(ARCHIVE['interval_minutes'] * 60 * 1000, self.archive_completed)
+    
+    def on_feed_resync(self):
         self.refresh_tasks()
     
+    def apply_changes(self, changes):
+        """Patch the Treeview with changes from the feed instead of reloading it"""
+        query = self.current_query()
+        in_place = query.order_by in ('created_at', 'id')
+        # New rows go on top only while the list stays within one page;
+        # otherwise a bulk import elsewhere would pile every row in here
+        space = PAGE_SIZE - len(self.rendered)
+        reload = False
+        shrink = False
+        for change in changes:
+            iid = str(change['task_id'])
+            task = change['task']
+            visible = query.matches(task) if task is not None else False
+            if task is None and query.include_archived:
+                # The task may have moved to the archive rather than been deleted
+                reload = True
+            elif visible is None:
+                reload = True
+            elif not visible:
+                if iid in self.rendered:
+                    self.tree.delete(iid)
+                    del self.rendered[iid]
+            elif iid in self.rendered:
+                values, tags = self.task_row(task)
+                self.render_row(iid, values, tags, self.tree.index(iid))
+                # The sort key may have changed, moving the row
+                reload = reload or not in_place
+            elif change['op'] == 'insert' and in_place and query.descending:
+                if space <= 0:
+                    reload = shrink = True
+                    continue
+                # Newest first: a new task belongs at the top
+                values, tags = self.task_row(task)
+                self.render_row(iid, values, tags, 0)
+                space -= 1
+            else:
+                reload = True
+        if reload:
+            self.refresh_tasks(PAGE_SIZE if shrink else None)
+        else:
+            self.update_statistics()
+    
+    def on_database_error(self, e):
+        if self.startup_marks is not None:
+            print(f"Database error: {e}")
+            self.mark_startup('failed_ms')
+            return
+        messagebox.showerror("Database Error", 
+            f"Failed to connect to database!\n\n"
+            f"Error: {str(e)}\n\n"
+            f"Please check the STORAGE and DB_CONFIG settings in config.py")
+        self.on_close()
+    
+    def on_close(self):
+        self.feed.stop()
+        if self.profiler.running:
+            self.toggle_profiler()
+        if metrics.enabled:
+            metrics.flush()
+        self.executor.shutdown()
+        self.root.destroy()
+    
+    def toggle_profiler(self):
+        if not self.profiler.running:
+            self.profiler = SamplingProfiler()
+            self.profiler.start()
+            self.progress_label.config(text="Profiling event loop... (Ctrl+Shift+P to stop)")
+            return
+        self.profiler.stop()
+        filename = f"gui_profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+        self.profiler.write_collapsed(filename)
+        print(f"Event loop profile written to {filename}; hottest functions:")
+        for name, samples in self.profiler.top(10):
+            print(f"  {samples:6d}  {name}")
+        self.progress_label.config(text=f"Profile written to {filename}")
+    
+    def dump_metrics(self):
+        if not metrics.enabled:
+            metrics.enable()
+            self.progress_label.config(text="Query metrics enabled (Ctrl+Shift+M again to dump)")
+            return
+        filename = INSTRUMENTATION['prometheus_path']
+        PrometheusFileExporter(filename).export(metrics)
+        self.progress_label.config(text=f"Query metrics written to {filename}")
+    
+    def run_db(self, fn, *args, on_success=None, on_error=None, key=None, **kwargs):
+        """Run a TaskManager call in the background once the database is up"""
+        if not self.db_ready:
+            messagebox.showinfo("Please wait", "Still connecting to the database...")
+            return None
+        return self.executor.submit(fn, *args, on_success=on_success, key=key,
+                                    on_error=on_error or self.on_db_error, **kwargs)
+    
+    def on_db_error(self, e):
+        messagebox.showerror("Database Error", f"Operation failed: {str(e)}")
+    
+    def show_loading(self, busy):
+        if busy:
+            self.loading_bar.pack(side=tk.RIGHT, padx=5)
+            self.loading_bar.start(15)
+        else:
+            self.loading_bar.stop()
+            self.loading_bar.pack_forget()
+    
     def create_widgets(self):
         # Title
         title_label = tk.Label(self.root, text="TASK MANAGER", font=("Arial", 20, "bold"), bg="#4CAF50", fg="white", pady=10)
@@ -41,6 +204,9 @@ class TaskManagerGUI:
         
         self.stats_label = tk.Label(stats_frame, text="Loading statistics...", font=("Arial", 10), bg="#f0f0f0")
         self.stats_label.pack()
+        self.loading_bar = ttk.Progressbar(stats_frame, mode="indeterminate", length=120)
+        self.progress_label = tk.Label(stats_frame, text="", font=("Arial", 9), bg="#f0f0f0", fg="#555555")
+        self.progress_label.pack()
         
         # Input Frame
         input_frame = tk.LabelFrame(self.root, text="Add New Task", font=("Arial", 12, "bold"), padx=10, pady=10)
@@ -60,8 +226,10 @@ class TaskManagerGUI:
         priority_combo.grid(row=0, column=3, pady=5, padx=10)
         
         tk.Label(input_frame, text="Due Date:", font=("Arial", 10)).grid(row=1, column=2, sticky=tk.W, pady=5, padx=(20,0))
-        self.due_date_entry = DateEntry(input_frame, width=10, font=("Arial", 10), date_pattern='yyyy-mm-dd')
-        self.due_date_entry.grid(row=1, column=3, pady=5, padx=10)
+        # tkcalendar (and babel behind it) is slow to import; build the date
+        # picker once the window is on screen
+        self.due_date_entry = None
+        self.root.after_idle(self.create_due_date_entry, input_frame)
         
         add_btn = tk.Button(input_frame, text="Add Task", command=self.add_task, bg="#4CAF50", fg="white", font=("Arial", 10, "bold"), width=15)
         add_btn.grid(row=2, column=3, pady=10, sticky=tk.E)
@@ -73,6 +241,7 @@ class TaskManagerGUI:
         tk.Label(search_frame, text="Search:", font=("Arial", 10)).pack(side=tk.LEFT, padx=5)
         self.search_entry = tk.Entry(search_frame, width=30, font=("Arial", 10))
         self.search_entry.pack(side=tk.LEFT, padx=5)
+        self.search_entry.bind("<KeyRelease>", self.on_search_key)
         tk.Button(search_frame, text="Search", command=self.search_tasks, bg="#2196F3", fg="white", font=("Arial", 9), width=10).pack(side=tk.LEFT, padx=5)
         
         tk.Label(search_frame, text="Filter:", font=("Arial", 10)).pack(side=tk.LEFT, padx=(20,5))
@@ -80,9 +249,12 @@ class TaskManagerGUI:
         filter_combo = ttk.Combobox(search_frame, textvariable=self.filter_var, values=["all", "pending", "in_progress", "completed"], state="readonly", width=12, font=("Arial", 9))
         filter_combo.pack(side=tk.LEFT, padx=5)
         filter_combo.bind("<<ComboboxSelected>>", lambda e: self.apply_filter())
+        self.show_archived = tk.BooleanVar(value=False)
+        tk.Checkbutton(search_frame, text="Archived", variable=self.show_archived, command=self.refresh_tasks, font=("Arial", 9)).pack(side=tk.LEFT, padx=5)
         
-        tk.Button(search_frame, text="Clear", command=self.refresh_tasks, bg="#9E9E9E", fg="white", font=("Arial", 9), width=10).pack(side=tk.LEFT, padx=5)
+        tk.Button(search_frame, text="Clear", command=self.clear_filters, bg="#9E9E9E", fg="white", font=("Arial", 9), width=10).pack(side=tk.LEFT, padx=5)
         tk.Button(search_frame, text="Export", command=self.export_tasks, bg="#FF9800", fg="white", font=("Arial", 9), width=10).pack(side=tk.LEFT, padx=5)
+        tk.Button(search_frame, text="Import", command=self.import_tasks, bg="#795548", fg="white", font=("Arial", 9), width=10).pack(side=tk.LEFT, padx=5)
         
         # Task List Frame
         list_frame = tk.LabelFrame(self.root, text="Task List", font=("Arial", 12, "bold"), padx=10, pady=10)
@@ -90,15 +262,20 @@ class TaskManagerGUI:
         
         # Treeview
         columns = ("ID", "Title", "Description", "Priority", "Status", "Due Date", "Created At")
-        self.tree = ttk.Treeview(list_frame, columns=columns, show="headings", height=10)
+        self.tree = ttk.Treeview(list_frame, columns=columns, show="headings", height=10, selectmode="extended")
+        
+        # Configure tag colors
+        self.tree.tag_configure('high_priority', background='#ffcccc')
+        self.tree.tag_configure('low_priority', background='#e8f5e9')
+        self.tree.tag_configure('archived', foreground='#9E9E9E')
         
-        self.tree.heading("ID", text="ID")
-        self.tree.heading("Title", text="Title")
-        self.tree.heading("Description", text="Description")
-        self.tree.heading("Priority", text="Priority")
-        self.tree.heading("Status", text="Status")
-        self.tree.heading("Due Date", text="Due Date")
-        self.tree.heading("Created At", text="Created At")
+        for heading in columns:
+            if heading in SORTABLE_COLUMNS:
+                self.tree.heading(heading, text=heading,
+                                  command=lambda h=heading: self.sort_by(SORTABLE_COLUMNS[h]))
+            else:
+                self.tree.heading(heading, text=heading)
+        self.update_sort_headings()
         
         self.tree.column("ID", width=40, anchor=tk.CENTER)
         self.tree.column("Title", width=150)
@@ -108,9 +285,9 @@ class TaskManagerGUI:
         self.tree.column("Due Date", width=100, anchor=tk.CENTER)
         self.tree.column("Created At", width=130, anchor=tk.CENTER)
         
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscroll=scrollbar.set)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscroll=self.on_tree_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.tree.pack(fill=tk.BOTH, expand=True)
         
         # Buttons Frame
@@ -121,142 +298,352 @@ class TaskManagerGUI:
         tk.Button(btn_frame, text="Mark In Progress", command=lambda: self.update_status("in_progress"), bg="#2196F3", fg="white", font=("Arial", 10), width=15).pack(side=tk.LEFT, padx=5)
         tk.Button(btn_frame, text="Mark Completed", command=lambda: self.update_status("completed"), bg="#4CAF50", fg="white", font=("Arial", 10), width=15).pack(side=tk.LEFT, padx=5)
         tk.Button(btn_frame, text="Delete Task", command=self.delete_task, bg="#f44336", fg="white", font=("Arial", 10), width=15).pack(side=tk.LEFT, padx=5)
-        tk.Button(btn_frame, text="Refresh", command=self.refresh_tasks, bg="#9E9E9E", fg="white", font=("Arial", 10), width=15).pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Refresh", command=self.reload_tasks, bg="#9E9E9E", fg="white", font=("Arial", 10), width=15).pack(side=tk.LEFT, padx=5)
+    
+    def create_due_date_entry(self, parent):
+        from tkcalendar import DateEntry
+        self.due_date_entry = DateEntry(parent, width=10, font=("Arial", 10), date_pattern='yyyy-mm-dd')
+        self.due_date_entry.grid(row=1, column=3, pady=5, padx=10)
+    
+    def mark_startup(self, milestone):
+        """Record when a startup milestone is first reached (--startup-time)"""
+        if self.startup_marks is None or milestone in self.startup_marks:
+            return
+        self.startup_marks[milestone] = round((time.perf_counter() - STARTED) * 1000, 1)
+        if milestone in ('task_list_shown_ms', 'failed_ms'):
+            print(json.dumps(self.startup_marks))
+            self.on_close()
     
     def add_task(self):
         title = self.title_entry.get().strip()
         description = self.desc_entry.get().strip()
         priority = self.priority_var.get()
-        due_date = self.due_date_entry.get_date().strftime('%Y-%m-%d')
+        due_date = None
+        if self.due_date_entry is not None:
+            due_date = self.due_date_entry.get_date().strftime('%Y-%m-%d')
         
         if not title:
             messagebox.showwarning("Input Error", "Title cannot be empty!")
             return
         
-        if self.manager.add_task(title, description, priority, due_date):
-            messagebox.showinfo("Success", f"Task '{title}' added successfully!")
-            self.title_entry.delete(0, tk.END)
-            self.desc_entry.delete(0, tk.END)
-            self.priority_var.set("medium")
-            self.refresh_tasks()
+        def on_added(added):
+            if added:
+                messagebox.showinfo("Success", f"Task '{title}' added successfully!")
+                self.title_entry.delete(0, tk.END)
+                self.desc_entry.delete(0, tk.END)
+                self.priority_var.set("medium")
+                self.refresh_tasks()
+        
+        self.run_db(self.manager.add_task, title, description, priority, due_date,
+                    on_success=on_added)
     
-    def refresh_tasks(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+    def load_task_list(self, fn, *args):
+        """Fetch rows for the Treeview, superseding any list request in flight"""
+        def on_loaded(result):
+            if isinstance(result, tuple):
+                self.display_tasks(*result)
+            else:
+                self.display_tasks(result)
         
-        tasks = self.manager.view_all_tasks()
-        self.display_tasks(tasks)
+        self.list_future = self.run_db(fn, *args, on_success=on_loaded, key="task_list")
+    
+    def reload_tasks(self):
+        # An explicit refresh bypasses cached results
+        self.manager.invalidate()
+        self.refresh_tasks()
+    
+    def refresh_tasks(self, limit=None):
+        # Reload as many rows as are loaded so the diff keeps the scroll position;
+        # the page and the statistics are fetched concurrently
+        if limit is None:
+            limit = max(PAGE_SIZE, len(self.rendered))
+        self.load_task_list(self.manager.query_tasks, self.current_query(), limit)
         self.update_statistics()
     
-    def display_tasks(self, tasks):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        if tasks:
-            for task in tasks:
-                # Color code by priority
-                tags = ()
-                if task.get('priority') == 'high':
-                    tags = ('high_priority',)
-                elif task.get('priority') == 'low':
-                    tags = ('low_priority',)
-                
-                self.tree.insert("", tk.END, values=(
-                    task['id'],
-                    task['title'],
-                    task['description'] or "",
-                    task.get('priority', 'medium'),
-                    task['status'],
-                    str(task.get('due_date', '')) if task.get('due_date') else "",
-                    str(task['created_at'])
-                ), tags=tags)
+    def current_query(self):
+        """TaskQuery for the filter, search text and sort order shown in the GUI"""
+        status = self.filter_var.get()
+        return TaskQuery(status=None if status == "all" else status,
+                         text=self.search_entry.get(),
+                         order_by=self.sort_column, descending=self.sort_descending,
+                         include_archived=self.show_archived.get())
+    
+    def sort_by(self, column):
+        # Clicking the sorted column again flips the direction
+        if column == self.sort_column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_column = column
+            self.sort_descending = column in ('created_at', 'priority')
+        self.update_sort_headings()
+        if self.db_ready:
+            self.load_task_list(self.manager.query_tasks, self.current_query(), PAGE_SIZE)
+    
+    def update_sort_headings(self):
+        for heading, column in SORTABLE_COLUMNS.items():
+            arrow = ""
+            if column == self.sort_column:
+                arrow = " \u25bc" if self.sort_descending else " \u25b2"
+            self.tree.heading(heading, text=heading + arrow)
+    
+    def clear_filters(self):
+        self.filter_var.set("all")
+        self.show_archived.set(False)
+        self.search_entry.delete(0, tk.END)
+        self.refresh_tasks()
+    
+    def on_tree_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        # Fetch the next page once the user scrolls near the bottom
+        if self.next_cursor is not None and float(last) >= 0.9:
+            self.load_more_tasks()
+    
+    def load_more_tasks(self):
+        if self.list_future is not None and not self.list_future.done():
+            return
         
-        # Configure tag colors
-        self.tree.tag_configure('high_priority', background='#ffcccc')
-        self.tree.tag_configure('low_priority', background='#e8f5e9')
+        def on_page(result):
+            tasks, self.next_cursor = result
+            self.append_tasks(tasks)
+        
+        self.list_future = self.run_db(self.manager.query_tasks, self.current_query(), PAGE_SIZE,
+                                       self.next_cursor, on_success=on_page, key="task_list")
+    
+    def task_row(self, task):
+        """Treeview values and tags for a task"""
+        # Color code by priority
+        tags = ()
+        if task.get('priority') == 'high':
+            tags = ('high_priority',)
+        elif task.get('priority') == 'low':
+            tags = ('low_priority',)
+        if task.get('archived'):
+            tags += ('archived',)
+        
+        values = (
+            task['id'],
+            task['title'],
+            task['description'] or "",
+            task.get('priority', 'medium'),
+            task['status'],
+            str(task.get('due_date', '')) if task.get('due_date') else "",
+            str(task['created_at'])
+        )
+        return values, tags
+    
+    def display_tasks(self, tasks, next_cursor=None):
+        """Make the Treeview show exactly `tasks`, touching only rows that changed
+        
+        Rows are keyed by task id, so selection survives and the scroll
+        position is restored afterwards.
+        """
+        self.next_cursor = next_cursor
+        scroll_top = self.tree.yview()[0]
+        self.root.after_idle(self.mark_startup, 'task_list_shown_ms')
+        
+        rows = [(str(task['id']),) + self.task_row(task) for task in tasks or ()]
+        wanted = {iid for iid, _, _ in rows}
+        stale = [iid for iid in self.rendered if iid not in wanted]
+        if stale:
+            self.tree.delete(*stale)
+            for iid in stale:
+                del self.rendered[iid]
+        
+        for index, (iid, values, tags) in enumerate(rows):
+            self.render_row(iid, values, tags, index)
+        
+        order = tuple(iid for iid, _, _ in rows)
+        if self.tree.get_children() != order:
+            for index, iid in enumerate(order):
+                self.tree.move(iid, "", index)
+        
+        self.tree.yview_moveto(scroll_top)
+    
+    def append_tasks(self, tasks):
+        for task in tasks or ():
+            values, tags = self.task_row(task)
+            self.render_row(str(task['id']), values, tags, tk.END)
+    
+    def render_row(self, iid, values, tags, index):
+        current = self.rendered.get(iid)
+        if current is None:
+            self.tree.insert("", index, iid=iid, values=values, tags=tags)
+        elif current != (values, tags):
+            self.tree.item(iid, values=values, tags=tags)
+        self.rendered[iid] = (values, tags)
     
     def search_tasks(self):
         search_term = self.search_entry.get().strip()
         if search_term:
-            tasks = self.manager.search_tasks(search_term)
-            self.display_tasks(tasks)
+            # Same query as refresh_tasks(), so feed updates keep the filter and order
+            self.apply_filter()
         else:
             messagebox.showwarning("Input Error", "Please enter a search term!")
     
-    def apply_filter(self):
-        filter_value = self.filter_var.get()
-        if filter_value == "all":
+    def on_search_key(self, event=None):
+        # Debounce so the query runs once typing pauses, not on every key
+        if self._search_job is not None:
+            self.root.after_cancel(self._search_job)
+        self._search_job = self.root.after(250, self.search_as_you_type)
+    
+    def search_as_you_type(self):
+        self._search_job = None
+        search_term = self.search_entry.get().strip()
+        if not self.db_ready:
+            return
+        if not search_term:
             self.refresh_tasks()
-        else:
-            tasks = self.manager.filter_by_status(filter_value)
-            self.display_tasks(tasks)
+        elif len(search_term) >= FT_MIN_TOKEN_SIZE:
+            self.apply_filter()
+    
+    def apply_filter(self):
+        # Status filter, search text and sort order combine in one query
+        self.load_task_list(self.manager.query_tasks, self.current_query(), PAGE_SIZE)
     
     def update_statistics(self):
-        stats = self.manager.get_statistics()
+        self.run_db(self.manager.get_statistics, include_archived=self.show_archived.get(),
+                    on_success=self.show_statistics, key="stats")
+    
+    def show_statistics(self, stats):
         if stats:
             self.stats_label.config(
                 text=f"Total: {stats['total']} | Pending: {stats['pending']} | "
                      f"In Progress: {stats['in_progress']} | Completed: {stats['completed']} | "
-                     f"High Priority: {stats['high_priority']}"
+                     f"High Priority: {stats['high_priority']} | Overdue: {stats['overdue']}"
             )
     
     def export_tasks(self):
-        tasks = self.manager.view_all_tasks()
-        if not tasks:
-            messagebox.showinfo("Export", "No tasks to export!")
+        default_name = f"tasks_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        filename = filedialog.asksaveasfilename(
+            title="Export Tasks", initialfile=default_name, defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("CSV (gzip)", "*.csv.gz"),
+                       ("JSON Lines", "*.jsonl"), ("JSON Lines (gzip)", "*.jsonl.gz"),
+                       ("Parquet", "*.parquet"), ("All files", "*.*")])
+        if not filename:
             return
         
-        try:
-            filename = f"tasks_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write("=" * 80 + "\n")
-                f.write("TASK MANAGER - EXPORT\n")
-                f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write("=" * 80 + "\n\n")
-                
-                for task in tasks:
-                    f.write(f"ID: {task['id']}\n")
-                    f.write(f"Title: {task['title']}\n")
-                    f.write(f"Description: {task['description'] or 'N/A'}\n")
-                    f.write(f"Priority: {task.get('priority', 'medium')}\n")
-                    f.write(f"Status: {task['status']}\n")
-                    f.write(f"Due Date: {task.get('due_date', 'N/A')}\n")
-                    f.write(f"Created: {task['created_at']}\n")
-                    f.write("-" * 80 + "\n\n")
-            
-            messagebox.showinfo("Export Success", f"Tasks exported to {filename}")
-        except Exception as e:
+        from export import export_tasks, guess_format
+        fmt, compression = guess_format(filename)
+        
+        def report(rows):
+            # Called on the worker thread; hand the update to the Tk thread
+            self.executor.post(self.progress_label.config, {'text': f"Exported {rows} tasks..."})
+        
+        def on_exported(written):
+            self.progress_label.config(text="")
+            if not written:
+                messagebox.showinfo("Export", "No tasks to export!")
+            else:
+                messagebox.showinfo("Export Success", f"{written} tasks exported to {filename}")
+        
+        def on_failed(e):
+            self.progress_label.config(text="")
             messagebox.showerror("Export Error", f"Failed to export tasks: {str(e)}")
+        
+        self.run_db(lambda: export_tasks(self.manager.iter_task_batches(), filename, fmt,
+                                         compression, progress=report),
+                    on_success=on_exported, on_error=on_failed)
+    
+    def import_tasks(self):
+        filename = filedialog.askopenfilename(
+            title="Import Tasks",
+            filetypes=[("Task files", "*.csv *.jsonl *.csv.gz *.jsonl.gz"), ("All files", "*.*")])
+        if not filename:
+            return
+        # Pulls in multiprocessing; only needed once the user imports
+        from importer import import_tasks
+        
+        def report(loaded, rejected):
+            self.executor.post(self.progress_label.config,
+                               {'text': f"Imported {loaded} tasks, {rejected} rejected..."})
+        
+        def on_imported(result):
+            self.progress_label.config(text="")
+            message = f"Imported {result['loaded']} tasks."
+            if result['rejected']:
+                details = "\n".join(f"Line {line}: {reason}" for line, reason in result['errors'][:10])
+                message += f"\n\n{result['rejected']} rows rejected:\n{details}"
+            messagebox.showinfo("Import", message)
+            self.refresh_tasks()
+        
+        def on_failed(e):
+            self.progress_label.config(text="")
+            messagebox.showerror("Import Error", f"Failed to import tasks: {str(e)}")
+        
+        self.run_db(import_tasks, self.manager, filename, progress=report,
+                    on_success=on_imported, on_error=on_failed)
+    
+    def selected_task_ids(self):
+        return [int(item) for item in self.tree.selection()]
     
     def update_status(self, status):
-        selected = self.tree.selection()
-        if not selected:
+        task_ids = self.selected_task_ids()
+        if not task_ids:
             messagebox.showwarning("Selection Error", "Please select a task!")
             return
         
-        task_id = self.tree.item(selected[0])['values'][0]
-        if self.manager.update_task_status(task_id, status):
-            messagebox.showinfo("Success", f"Task updated to '{status}'")
-            self.refresh_tasks()
+        if any('archived' in self.tree.item(str(task_id), 'tags') for task_id in task_ids):
+            messagebox.showwarning("Read-only", "Archived tasks are read-only; they can only be deleted.")
+            return
+        
+        if len(task_ids) == 1:
+            def on_updated(updated):
+                if updated:
+                    messagebox.showinfo("Success", f"Task updated to '{status}'")
+                    self.refresh_tasks()
+            
+            self.run_db(self.manager.update_task_status, task_ids[0], status,
+                        on_success=on_updated)
+        else:
+            def on_updated_many(updated):
+                messagebox.showinfo("Success", f"{updated} tasks updated to '{status}'")
+                self.refresh_tasks()
+            
+            self.run_db(self.manager.update_status_many, task_ids, status,
+                        on_success=on_updated_many)
     
     def delete_task(self):
-        selected = self.tree.selection()
-        if not selected:
+        task_ids = self.selected_task_ids()
+        if not task_ids:
             messagebox.showwarning("Selection Error", "Please select a task!")
             return
         
-        task_id = self.tree.item(selected[0])['values'][0]
-        confirm = messagebox.askyesno("Confirm Delete", f"Are you sure you want to delete task {task_id}?")
+        if len(task_ids) == 1:
+            prompt = f"Are you sure you want to delete task {task_ids[0]}?"
+        else:
+            prompt = f"Are you sure you want to delete {len(task_ids)} tasks?"
+        confirm = messagebox.askyesno("Confirm Delete", prompt)
         
         if confirm:
-            if self.manager.delete_task(task_id):
-                messagebox.showinfo("Success", "Task deleted successfully!")
-                self.refresh_tasks()
+            if len(task_ids) == 1:
+                def on_deleted(deleted):
+                    if deleted:
+                        messagebox.showinfo("Success", "Task deleted successfully!")
+                        self.refresh_tasks()
+                
+                self.run_db(self.manager.delete_task, task_ids[0], on_success=on_deleted)
+            else:
+                def on_deleted_many(deleted):
+                    messagebox.showinfo("Success", f"{deleted} tasks deleted successfully!")
+                    self.refresh_tasks()
+                
+                self.run_db(self.manager.delete_many, task_ids, on_success=on_deleted_many)
 
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Task Manager")
+    parser.add_argument('--startup-time', action='store_true',
+                        help="print startup milestones in ms as JSON once the task list is shown, then exit")
+    args = parser.parse_args(argv)
+    
+    imported = round((time.perf_counter() - STARTED) * 1000, 1)
     root = tk.Tk()
-    app = TaskManagerGUI(root)
+    app = TaskManagerGUI(root, measure_startup=args.startup_time)
+    if args.startup_time:
+        app.startup_marks['imports_ms'] = imported
+        # Process the pending map and draw events so the window is really up
+        root.update()
+        app.mark_startup('window_shown_ms')
     root.mainloop()
 
 
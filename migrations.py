@@ -0,0 +1,332 @@
+"""Versioned schema migrations for the task manager database"""
+from mysql.connector import Error
+from mysql.connector import errorcode
+
+# Each migration runs once and is recorded in schema_migrations. `checks`
+# lists hot queries with the index EXPLAIN is expected to pick for them.
+MIGRATIONS = [
+    {
+        'version': 1,
+        'description': 'create tasks table',
+        'statements': [
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                title VARCHAR(255) NOT NULL,
+                description TEXT,
+                status ENUM('pending', 'in_progress', 'completed') DEFAULT 'pending',
+                priority ENUM('low', 'medium', 'high') DEFAULT 'medium',
+                due_date DATE,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+        ],
+        'checks': [],
+    },
+    {
+        'version': 2,
+        'description': 'index status, created_at and priority read paths',
+        'statements': [
+            "CREATE INDEX idx_tasks_status_created ON tasks (status, created_at)",
+            "CREATE INDEX idx_tasks_created_id ON tasks (created_at, id)",
+            "CREATE INDEX idx_tasks_priority_status ON tasks (priority, status)",
+        ],
+        'checks': [
+            ("SELECT * FROM tasks WHERE status = %s ORDER BY created_at DESC",
+             ('pending',), 'idx_tasks_status_created'),
+            ("SELECT * FROM tasks ORDER BY created_at DESC, id DESC LIMIT %s",
+             (200,), 'idx_tasks_created_id'),
+            ("SELECT COUNT(*), SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END), "
+             "SUM(CASE WHEN priority = 'high' THEN 1 ELSE 0 END) FROM tasks",
+             (), 'idx_tasks_priority_status'),
+        ],
+    },
+    {
+        'version': 3,
+        'description': 'full-text index on title and description',
+        'statements': [
+            "ALTER TABLE tasks ADD FULLTEXT INDEX ft_tasks_title_description (title, description)",
+        ],
+        'checks': [
+            ("SELECT * FROM tasks WHERE MATCH(title, description) AGAINST (%s IN BOOLEAN MODE)",
+             ('+report*',), 'ft_tasks_title_description'),
+        ],
+    },
+    {
+        'version': 4,
+        'description': 'trigger-maintained task_stats and task_due_stats counters',
+        'statements': [
+            """
+            CREATE TABLE IF NOT EXISTS task_stats (
+                status ENUM('pending', 'in_progress', 'completed') NOT NULL,
+                priority ENUM('low', 'medium', 'high') NOT NULL,
+                task_count INT NOT NULL DEFAULT 0,
+                PRIMARY KEY (status, priority)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS task_due_stats (
+                due_date DATE NOT NULL,
+                status ENUM('pending', 'in_progress', 'completed') NOT NULL,
+                task_count INT NOT NULL DEFAULT 0,
+                PRIMARY KEY (due_date, status)
+            )
+            """,
+            "DELETE FROM task_stats",
+            """
+            INSERT INTO task_stats (status, priority, task_count)
+            SELECT status, priority, COUNT(*) FROM tasks
+            WHERE status IS NOT NULL AND priority IS NOT NULL
+            GROUP BY status, priority
+            """,
+            "DELETE FROM task_due_stats",
+            """
+            INSERT INTO task_due_stats (due_date, status, task_count)
+            SELECT due_date, status, COUNT(*) FROM tasks
+            WHERE due_date IS NOT NULL AND status IS NOT NULL
+            GROUP BY due_date, status
+            """,
+            "DROP TRIGGER IF EXISTS tasks_stats_insert",
+            """
+            CREATE TRIGGER tasks_stats_insert AFTER INSERT ON tasks FOR EACH ROW
+            BEGIN
+                INSERT INTO task_stats (status, priority, task_count)
+                VALUES (NEW.status, NEW.priority, 1)
+                ON DUPLICATE KEY UPDATE task_count = task_count + 1;
+                IF NEW.due_date IS NOT NULL THEN
+                    INSERT INTO task_due_stats (due_date, status, task_count)
+                    VALUES (NEW.due_date, NEW.status, 1)
+                    ON DUPLICATE KEY UPDATE task_count = task_count + 1;
+                END IF;
+            END
+            """,
+            "DROP TRIGGER IF EXISTS tasks_stats_update",
+            """
+            CREATE TRIGGER tasks_stats_update AFTER UPDATE ON tasks FOR EACH ROW
+            BEGIN
+                IF NOT (OLD.status <=> NEW.status AND OLD.priority <=> NEW.priority) THEN
+                    UPDATE task_stats SET task_count = task_count - 1
+                    WHERE status = OLD.status AND priority = OLD.priority;
+                    INSERT INTO task_stats (status, priority, task_count)
+                    VALUES (NEW.status, NEW.priority, 1)
+                    ON DUPLICATE KEY UPDATE task_count = task_count + 1;
+                END IF;
+                IF NOT (OLD.status <=> NEW.status AND OLD.due_date <=> NEW.due_date) THEN
+                    IF OLD.due_date IS NOT NULL THEN
+                        UPDATE task_due_stats SET task_count = task_count - 1
+                        WHERE due_date = OLD.due_date AND status = OLD.status;
+                    END IF;
+                    IF NEW.due_date IS NOT NULL THEN
+                        INSERT INTO task_due_stats (due_date, status, task_count)
+                        VALUES (NEW.due_date, NEW.status, 1)
+                        ON DUPLICATE KEY UPDATE task_count = task_count + 1;
+                    END IF;
+                END IF;
+            END
+            """,
+            "DROP TRIGGER IF EXISTS tasks_stats_delete",
+            """
+            CREATE TRIGGER tasks_stats_delete AFTER DELETE ON tasks FOR EACH ROW
+            BEGIN
+                UPDATE task_stats SET task_count = task_count - 1
+                WHERE status = OLD.status AND priority = OLD.priority;
+                IF OLD.due_date IS NOT NULL THEN
+                    UPDATE task_due_stats SET task_count = task_count - 1
+                    WHERE due_date = OLD.due_date AND status = OLD.status;
+                END IF;
+            END
+            """,
+        ],
+        'checks': [
+            ("SELECT status, SUM(task_count) FROM task_due_stats "
+             "WHERE due_date < CURDATE() AND status <> 'completed' GROUP BY status",
+             (), 'PRIMARY'),
+        ],
+    },
+    {
+        'version': 5,
+        'description': 'index the sortable task list columns for keyset paging',
+        'statements': [
+            "CREATE INDEX idx_tasks_due_id ON tasks (due_date, id)",
+            "CREATE INDEX idx_tasks_title_id ON tasks (title, id)",
+            "CREATE INDEX idx_tasks_status_id ON tasks (status, id)",
+            "CREATE INDEX idx_tasks_priority_id ON tasks (priority, id)",
+        ],
+        'checks': [
+            ("SELECT * FROM tasks ORDER BY due_date DESC, id DESC LIMIT %s",
+             (200,), 'idx_tasks_due_id'),
+            ("SELECT * FROM tasks ORDER BY title, id LIMIT %s",
+             (200,), 'idx_tasks_title_id'),
+            ("SELECT * FROM tasks ORDER BY priority DESC, id DESC LIMIT %s",
+             (200,), 'idx_tasks_priority_id'),
+        ],
+    },
+    {
+        'version': 6,
+        'description': 'trigger-maintained task_changes feed for live sync',
+        'statements': [
+            """
+            CREATE TABLE IF NOT EXISTS task_changes (
+                change_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                task_id INT NOT NULL,
+                op ENUM('insert', 'update', 'delete') NOT NULL,
+                changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                INDEX idx_task_changes_changed_at (changed_at)
+            )
+            """,
+            "DROP TRIGGER IF EXISTS tasks_changes_insert",
+            """
+            CREATE TRIGGER tasks_changes_insert AFTER INSERT ON tasks FOR EACH ROW
+            INSERT INTO task_changes (task_id, op) VALUES (NEW.id, 'insert')
+            """,
+            "DROP TRIGGER IF EXISTS tasks_changes_update",
+            """
+            CREATE TRIGGER tasks_changes_update AFTER UPDATE ON tasks FOR EACH ROW
+            INSERT INTO task_changes (task_id, op) VALUES (NEW.id, 'update')
+            """,
+            "DROP TRIGGER IF EXISTS tasks_changes_delete",
+            """
+            CREATE TRIGGER tasks_changes_delete AFTER DELETE ON tasks FOR EACH ROW
+            INSERT INTO task_changes (task_id, op) VALUES (OLD.id, 'delete')
+            """,
+        ],
+        'checks': [
+            ("SELECT * FROM task_changes WHERE change_id > %s ORDER BY change_id LIMIT %s",
+             (0, 500), 'PRIMARY'),
+        ],
+    },
+    {
+        'version': 7,
+        'description': 'tasks_archive for old completed tasks, with its own counters',
+        'statements': [
+            """
+            CREATE TABLE IF NOT EXISTS tasks_archive (
+                id INT PRIMARY KEY,
+                title VARCHAR(255) NOT NULL,
+                description TEXT,
+                status ENUM('pending', 'in_progress', 'completed') DEFAULT 'completed',
+                priority ENUM('low', 'medium', 'high') DEFAULT 'medium',
+                due_date DATE,
+                created_at TIMESTAMP NULL DEFAULT NULL,
+                archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                INDEX idx_archive_created_id (created_at, id),
+                INDEX idx_archive_status_created (status, created_at)
+            )
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS task_archive_stats (
+                status ENUM('pending', 'in_progress', 'completed') NOT NULL,
+                priority ENUM('low', 'medium', 'high') NOT NULL,
+                task_count INT NOT NULL DEFAULT 0,
+                PRIMARY KEY (status, priority)
+            )
+            """,
+            "DROP TRIGGER IF EXISTS tasks_archive_stats_insert",
+            """
+            CREATE TRIGGER tasks_archive_stats_insert AFTER INSERT ON tasks_archive FOR EACH ROW
+            INSERT INTO task_archive_stats (status, priority, task_count)
+            VALUES (NEW.status, NEW.priority, 1)
+            ON DUPLICATE KEY UPDATE task_count = task_count + 1
+            """,
+            "DROP TRIGGER IF EXISTS tasks_archive_stats_delete",
+            """
+            CREATE TRIGGER tasks_archive_stats_delete AFTER DELETE ON tasks_archive FOR EACH ROW
+            UPDATE task_archive_stats SET task_count = task_count - 1
+            WHERE status = OLD.status AND priority = OLD.priority
+            """,
+        ],
+        'checks': [
+            ("SELECT id FROM tasks WHERE status = %s AND created_at < %s "
+             "ORDER BY created_at, id LIMIT %s",
+             ('completed', '2000-01-01', 500), 'idx_tasks_status_created'),
+        ],
+    },
+]
+
+LATEST_VERSION = MIGRATIONS[-1]['version']
+
+
+def ensure_migrations_table(cursor):
+    """Create the table that records applied migrations"""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description VARCHAR(255) NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def applied_versions(cursor):
+    """Return the set of migration versions already applied"""
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def run_migrations(connection):
+    """Apply every pending migration in order; returns the versions applied"""
+    cursor = connection.cursor()
+    ensure_migrations_table(cursor)
+    done = applied_versions(cursor)
+    applied = []
+    for migration in MIGRATIONS:
+        if migration['version'] in done:
+            continue
+        print(f"Applying migration {migration['version']}: {migration['description']}")
+        for statement in migration['statements']:
+            try:
+                cursor.execute(statement)
+            except Error as e:
+                # DDL commits implicitly, so a half-applied migration may have
+                # created some indexes already; re-running skips those
+                if e.errno != errorcode.ER_DUP_KEYNAME:
+                    raise
+        cursor.execute(
+            "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+            (migration['version'], migration['description'])
+        )
+        connection.commit()
+        applied.append(migration['version'])
+        for query, expected, actual in check_indexes(connection, [migration]):
+            print(f"Warning: expected index '{expected}' but EXPLAIN chose "
+                  f"'{actual}' for: {query}")
+    cursor.close()
+    return applied
+
+
+def explain_key(cursor, query, params=()):
+    """Return the index MySQL picks for a query's first table, or None"""
+    cursor.execute("EXPLAIN " + query, params)
+    columns = [column[0] for column in cursor.description]
+    rows = cursor.fetchall()
+    if not rows:
+        return None
+    return dict(zip(columns, rows[0])).get('key')
+
+
+def check_indexes(connection, migrations=None):
+    """Run the EXPLAIN checks; returns (query, expected, actual) mismatches
+
+    On nearly empty tables the optimizer may prefer a full scan, so a
+    mismatch right after creating the schema is not necessarily a problem.
+    """
+    cursor = connection.cursor()
+    mismatches = []
+    for migration in migrations or MIGRATIONS:
+        for query, params, expected in migration['checks']:
+            actual = explain_key(cursor, query, params)
+            if actual != expected:
+                mismatches.append((query, expected, actual))
+    cursor.close()
+    return mismatches
+
+
+if __name__ == "__main__":
+    from database import pooled_connection
+
+    with pooled_connection() as connection:
+        mismatches = check_indexes(connection)
+    for query, expected, actual in mismatches:
+        print(f"MISS  {expected} (got {actual}): {query}")
+    if not mismatches:
+        print("All hot queries use their intended indexes")
@@ -0,0 +1,125 @@
+"""In-process inverted index with BM25 ranking for task search"""
+import bisect
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Upper bound on vocabulary terms a prefix may expand to
+MAX_PREFIX_EXPANSIONS = 50
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens"""
+    if not text:
+        return []
+    return TOKEN_RE.findall(text.lower())
+
+
+class InvertedIndex:
+    """Postings lists keyed by term, scored with Okapi BM25
+
+    Documents are added, updated and removed one at a time so the index can
+    be kept in step with writes instead of being rebuilt.
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = {}      # term -> {doc_id: term frequency}
+        self._doc_terms = {}     # doc_id -> Counter of its terms
+        self._doc_lengths = {}   # doc_id -> number of tokens
+        self._vocabulary = []    # sorted terms, for prefix lookups
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def add(self, doc_id, *fields):
+        """Index a document made of one or more text fields"""
+        terms = Counter()
+        for field in fields:
+            terms.update(tokenize(field))
+        with self._lock:
+            self._remove(doc_id)
+            self._doc_terms[doc_id] = terms
+            self._doc_lengths[doc_id] = sum(terms.values())
+            self._total_length += self._doc_lengths[doc_id]
+            for term, freq in terms.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = {}
+                    bisect.insort(self._vocabulary, term)
+                postings[doc_id] = freq
+
+    update = add
+
+    def remove(self, doc_id):
+        """Drop a document from the index"""
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+                position = bisect.bisect_left(self._vocabulary, term)
+                del self._vocabulary[position]
+
+    def _expand(self, prefix):
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        expanded = []
+        for term in self._vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            expanded.append(term)
+        return expanded
+
+    def search(self, query, limit=100, prefix_last=True):
+        """Return [(doc_id, score)] best first; every query term must match
+
+        With prefix_last the final term also matches longer words, which is
+        what search-as-you-type needs.
+        """
+        terms = tokenize(query)
+        if not terms:
+            return []
+        with self._lock:
+            doc_count = len(self._doc_terms)
+            if not doc_count:
+                return []
+            avg_length = self._total_length / doc_count
+            scores = None
+            for position, term in enumerate(terms):
+                if prefix_last and position == len(terms) - 1:
+                    variants = self._expand(term)
+                else:
+                    variants = [term] if term in self._postings else []
+                term_scores = {}
+                for variant in variants:
+                    postings = self._postings[variant]
+                    df = len(postings)
+                    idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                    for doc_id, freq in postings.items():
+                        length = self._doc_lengths[doc_id]
+                        norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+                        term_scores[doc_id] = (term_scores.get(doc_id, 0.0)
+                                               + idf * freq * (self.k1 + 1) / (freq + norm))
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {doc_id: score + term_scores[doc_id]
+                              for doc_id, score in scores.items() if doc_id in term_scores}
+                if not scores:
+                    return []
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
@@ -0,0 +1,542 @@
+"""Storage backends behind TaskManager
+
+MySQLBackend runs against the configured server through the pool in
+database.py. SQLiteBackend keeps everything in one local file (WAL mode,
+the same indexes, trigger-maintained counters and an FTS5 search index), so
+single-user and offline sessions start instantly and need no server.
+Pick one with STORAGE['backend'] in config.py.
+
+Both expose the same small surface: `dialect`, `Error`, `initialize()`,
+`connection()` (a context manager yielding a connection whose cursors take
+%s placeholders and `dictionary=True`), plus the few dialect-specific
+pieces TaskManager needs.
+"""
+import datetime
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from config import STORAGE, FT_MIN_TOKEN_SIZE
+from instrumentation import InstrumentedConnection, metrics
+
+
+# InnoDB's default full-text stopwords (INFORMATION_SCHEMA.INNODB_FT_DEFAULT_STOPWORD)
+# plus 'and'; they are not indexed, so a required +term for one matches nothing
+INNODB_STOPWORDS = frozenset((
+    'a', 'about', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'com', 'de', 'en', 'for', 'from',
+    'how', 'i', 'in', 'is', 'it', 'la', 'of', 'on', 'or', 'that', 'the', 'this', 'to',
+    'was', 'what', 'when', 'where', 'who', 'will', 'with', 'und', 'www',
+))
+
+
+def ordinal_case(column, values):
+    """SQL expression ranking an enum-like TEXT column 1, 2, ... in `values` order"""
+    whens = " ".join(f"WHEN '{value}' THEN {rank}" for rank, value in enumerate(values, 1))
+    return f"(CASE {column} {whens} END)"
+
+
+SQLITE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS tasks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title VARCHAR(255) NOT NULL,
+        description TEXT,
+        status TEXT DEFAULT 'pending' CHECK (status IN ('pending', 'in_progress', 'completed')),
+        priority TEXT DEFAULT 'medium' CHECK (priority IN ('low', 'medium', 'high')),
+        due_date DATE,
+        created_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+    );
+    CREATE INDEX IF NOT EXISTS idx_tasks_status_created ON tasks (status, created_at);
+    CREATE INDEX IF NOT EXISTS idx_tasks_created_id ON tasks (created_at, id);
+    CREATE INDEX IF NOT EXISTS idx_tasks_priority_status ON tasks (priority, status);
+"""
+
+# Completed tasks moved out of tasks by TaskManager.archive_completed()
+SQLITE_ARCHIVE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS tasks_archive (
+        id INTEGER PRIMARY KEY,
+        title VARCHAR(255) NOT NULL,
+        description TEXT,
+        status TEXT DEFAULT 'completed',
+        priority TEXT DEFAULT 'medium',
+        due_date DATE,
+        created_at TIMESTAMP,
+        archived_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+    );
+    CREATE INDEX IF NOT EXISTS idx_archive_created_id ON tasks_archive (created_at, id);
+    CREATE INDEX IF NOT EXISTS idx_archive_status_created ON tasks_archive (status, created_at);
+    CREATE TABLE IF NOT EXISTS task_archive_stats (
+        status TEXT NOT NULL,
+        priority TEXT NOT NULL,
+        task_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (status, priority)
+    ) WITHOUT ROWID;
+    CREATE TRIGGER IF NOT EXISTS tasks_archive_stats_insert AFTER INSERT ON tasks_archive
+    BEGIN
+        INSERT INTO task_archive_stats (status, priority, task_count)
+        VALUES (NEW.status, NEW.priority, 1)
+        ON CONFLICT (status, priority) DO UPDATE SET task_count = task_count + 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS tasks_archive_stats_delete AFTER DELETE ON tasks_archive
+    BEGIN
+        UPDATE task_archive_stats SET task_count = task_count - 1
+        WHERE status = OLD.status AND priority = OLD.priority;
+    END;
+"""
+
+# SQLite counterpart of migrations.py; the applied version is kept in
+# PRAGMA user_version
+SQLITE_MIGRATIONS = [
+    {
+        'version': 1,
+        'description': 'create tasks table and indexes',
+        'script': SQLITE_SCHEMA,
+    },
+    {
+        'version': 2,
+        'description': 'trigger-maintained task_stats and task_due_stats counters',
+        'script': """
+            CREATE TABLE IF NOT EXISTS task_stats (
+                status TEXT NOT NULL,
+                priority TEXT NOT NULL,
+                task_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (status, priority)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS task_due_stats (
+                due_date DATE NOT NULL,
+                status TEXT NOT NULL,
+                task_count INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (due_date, status)
+            ) WITHOUT ROWID;
+            DELETE FROM task_stats;
+            INSERT INTO task_stats (status, priority, task_count)
+            SELECT status, priority, COUNT(*) FROM tasks
+            WHERE status IS NOT NULL AND priority IS NOT NULL
+            GROUP BY status, priority;
+            DELETE FROM task_due_stats;
+            INSERT INTO task_due_stats (due_date, status, task_count)
+            SELECT due_date, status, COUNT(*) FROM tasks
+            WHERE due_date IS NOT NULL AND status IS NOT NULL
+            GROUP BY due_date, status;
+            CREATE TRIGGER IF NOT EXISTS tasks_stats_insert AFTER INSERT ON tasks
+            BEGIN
+                INSERT INTO task_stats (status, priority, task_count)
+                VALUES (NEW.status, NEW.priority, 1)
+                ON CONFLICT (status, priority) DO UPDATE SET task_count = task_count + 1;
+                INSERT INTO task_due_stats (due_date, status, task_count)
+                SELECT NEW.due_date, NEW.status, 1 WHERE NEW.due_date IS NOT NULL
+                ON CONFLICT (due_date, status) DO UPDATE SET task_count = task_count + 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS tasks_stats_update AFTER UPDATE OF status, priority ON tasks
+            WHEN OLD.status IS NOT NEW.status OR OLD.priority IS NOT NEW.priority
+            BEGIN
+                UPDATE task_stats SET task_count = task_count - 1
+                WHERE status = OLD.status AND priority = OLD.priority;
+                INSERT INTO task_stats (status, priority, task_count)
+                VALUES (NEW.status, NEW.priority, 1)
+                ON CONFLICT (status, priority) DO UPDATE SET task_count = task_count + 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS tasks_due_stats_update AFTER UPDATE OF status, due_date ON tasks
+            WHEN OLD.status IS NOT NEW.status OR OLD.due_date IS NOT NEW.due_date
+            BEGIN
+                UPDATE task_due_stats SET task_count = task_count - 1
+                WHERE due_date = OLD.due_date AND status = OLD.status;
+                INSERT INTO task_due_stats (due_date, status, task_count)
+                SELECT NEW.due_date, NEW.status, 1 WHERE NEW.due_date IS NOT NULL
+                ON CONFLICT (due_date, status) DO UPDATE SET task_count = task_count + 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS tasks_stats_delete AFTER DELETE ON tasks
+            BEGIN
+                UPDATE task_stats SET task_count = task_count - 1
+                WHERE status = OLD.status AND priority = OLD.priority;
+                UPDATE task_due_stats SET task_count = task_count - 1
+                WHERE due_date = OLD.due_date AND status = OLD.status;
+            END;
+        """,
+    },
+    {
+        'version': 3,
+        'description': 'FTS5 index on title and description',
+        'script': """
+            CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts
+            USING fts5(title, description, content='tasks', content_rowid='id');
+            INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild');
+            CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks
+            BEGIN
+                INSERT INTO tasks_fts (rowid, title, description)
+                VALUES (NEW.id, NEW.title, NEW.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks
+            BEGIN
+                INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+                VALUES ('delete', OLD.id, OLD.title, OLD.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks
+            BEGIN
+                INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+                VALUES ('delete', OLD.id, OLD.title, OLD.description);
+                INSERT INTO tasks_fts (rowid, title, description)
+                VALUES (NEW.id, NEW.title, NEW.description);
+            END;
+        """,
+    },
+    {
+        'version': 4,
+        'description': 'index the sortable task list columns for keyset paging',
+        # Status and priority sort by rank, so their indexes are on the same
+        # CASE expressions SQLiteBackend.ordinal_sql() produces
+        'script': f"""
+            CREATE INDEX IF NOT EXISTS idx_tasks_due_id ON tasks (due_date, id);
+            CREATE INDEX IF NOT EXISTS idx_tasks_title_id ON tasks (title, id);
+            CREATE INDEX IF NOT EXISTS idx_tasks_status_rank
+            ON tasks ({ordinal_case('status', ('pending', 'in_progress', 'completed'))}, id);
+            CREATE INDEX IF NOT EXISTS idx_tasks_priority_rank
+            ON tasks ({ordinal_case('priority', ('low', 'medium', 'high'))}, id);
+        """,
+    },
+    {
+        'version': 5,
+        'description': 'trigger-maintained task_changes feed for live sync',
+        'script': """
+            CREATE TABLE IF NOT EXISTS task_changes (
+                change_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_id INTEGER NOT NULL,
+                op TEXT NOT NULL CHECK (op IN ('insert', 'update', 'delete')),
+                changed_at TIMESTAMP DEFAULT (datetime('now', 'localtime'))
+            );
+            CREATE INDEX IF NOT EXISTS idx_task_changes_changed_at ON task_changes (changed_at);
+            CREATE TRIGGER IF NOT EXISTS tasks_changes_insert AFTER INSERT ON tasks
+            BEGIN
+                INSERT INTO task_changes (task_id, op) VALUES (NEW.id, 'insert');
+            END;
+            CREATE TRIGGER IF NOT EXISTS tasks_changes_update AFTER UPDATE ON tasks
+            BEGIN
+                INSERT INTO task_changes (task_id, op) VALUES (NEW.id, 'update');
+            END;
+            CREATE TRIGGER IF NOT EXISTS tasks_changes_delete AFTER DELETE ON tasks
+            BEGIN
+                INSERT INTO task_changes (task_id, op) VALUES (OLD.id, 'delete');
+            END;
+        """,
+    },
+    {
+        'version': 6,
+        'description': 'tasks_archive for old completed tasks, with its own counters',
+        'script': SQLITE_ARCHIVE_SCHEMA,
+    },
+]
+
+SQLITE_LATEST_VERSION = SQLITE_MIGRATIONS[-1]['version']
+
+
+def get_backend(name=None):
+    """Create the backend named in STORAGE['backend'] (or `name`)"""
+    name = name or STORAGE['backend']
+    if name == 'mysql':
+        return MySQLBackend()
+    if name == 'sqlite':
+        return SQLiteBackend(STORAGE['sqlite_path'])
+    raise ValueError(f"Unknown storage backend: {name}")
+
+
+class MySQLBackend:
+    """The MySQL server from DB_CONFIG, via the pool in database.py"""
+
+    dialect = 'mysql'
+    today_sql = "CURDATE()"
+    for_update_sql = " FOR UPDATE"
+    # InnoDB does not index words shorter than its min token size
+    min_token_size = FT_MIN_TOKEN_SIZE
+
+    def __init__(self):
+        self._database = None
+
+    def _load(self):
+        # mysql.connector takes ~100 ms to import, so it is loaded on first
+        # use (normally on the worker thread running initialize()) rather
+        # than when the GUI constructs its TaskManager
+        if self._database is None:
+            import database
+            from mysql.connector import errorcode
+            self._errorcode = errorcode
+            self._database = database
+        return self._database
+
+    @property
+    def Error(self):
+        self._load()
+        from mysql.connector import Error
+        return Error
+
+    def initialize(self):
+        self._load().initialize_database()
+
+    def connection(self):
+        return self._load().pooled_connection()
+
+    def close(self):
+        if self._database is not None:
+            self._database.close_pool()
+
+    def fulltext_terms(self, tokens):
+        """Tokens the full-text index can match; the rest are left out"""
+        return [t for t in tokens if len(t) >= self.min_token_size and t not in INNODB_STOPWORDS]
+
+    def fulltext_query(self, terms, limit):
+        against = self._against(terms)
+        query = ("SELECT * FROM tasks "
+                 "WHERE MATCH(title, description) AGAINST (%s IN BOOLEAN MODE) "
+                 "ORDER BY MATCH(title, description) AGAINST (%s IN BOOLEAN MODE) DESC "
+                 "LIMIT %s")
+        return query, (against, against, limit)
+
+    def fulltext_predicate(self, terms):
+        return "MATCH(title, description) AGAINST (%s IN BOOLEAN MODE)", (self._against(terms),)
+
+    def _against(self, terms):
+        # Every word is required and the last one is a prefix: "+fix +log*"
+        return " ".join(f"+{term}" for term in terms) + "*"
+
+    def is_fulltext_missing(self, error):
+        return error.errno == self._errorcode.ER_FT_MATCHING_KEY_NOT_FOUND
+
+    def ordinal_sql(self, column, values):
+        # ENUMs already sort in declaration order and compare to integers by
+        # that 1-based index, so the bare column keeps its index usable
+        return column
+
+    def rank_sql(self, column, values):
+        # UNION turns ENUMs into strings, so merged results sort on the index
+        return f"({column} + 0)"
+
+    def bulk_load(self, rows):
+        """LOAD DATA LOCAL INFILE a list of task_values() tuples
+
+        Returns the number of rows loaded, or None when local_infile is
+        disabled on either end and the caller should INSERT instead.
+        """
+        with tempfile.NamedTemporaryFile('w', suffix='.tsv', encoding='utf-8',
+                                         newline='\n', delete=False) as data_file:
+            for row in rows:
+                data_file.write("\t".join(_infile_field(value) for value in row) + "\n")
+        try:
+            connection = self._load().open_local_infile_connection()
+            try:
+                cursor = connection.cursor()
+                cursor.execute(
+                    "LOAD DATA LOCAL INFILE %s INTO TABLE tasks CHARACTER SET utf8mb4 "
+                    "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+                    "(title, description, status, priority, due_date)",
+                    (data_file.name,)
+                )
+                connection.commit()
+                loaded = cursor.rowcount
+                cursor.close()
+            finally:
+                connection.close()
+        except self.Error as e:
+            if e.errno not in (self._errorcode.ER_NOT_ALLOWED_COMMAND,
+                               self._errorcode.ER_CLIENT_LOCAL_FILES_DISABLED,
+                               self._errorcode.CR_LOAD_DATA_LOCAL_INFILE_REJECTED):
+                raise
+            print("LOAD DATA LOCAL INFILE is disabled, falling back to multi-row INSERT")
+            return None
+        finally:
+            os.unlink(data_file.name)
+        return loaded
+
+
+def _infile_field(value):
+    # MySQL's default LOAD DATA escaping: \N is NULL, backslash escapes
+    if value is None:
+        return "\\N"
+    return (str(value).replace("\\", "\\\\").replace("\t", "\\t")
+            .replace("\n", "\\n").replace("\r", "\\r"))
+
+
+class SQLiteBackend:
+    """An embedded SQLite database file, one connection per thread
+
+    WAL mode lets the GUI's reader threads run alongside a writer, and
+    each connection keeps a cache of prepared statements, so repeated
+    queries skip parsing.
+    """
+
+    dialect = 'sqlite'
+    today_sql = "date('now', 'localtime')"
+    # One writer at a time already; the move re-checks its rows under the write lock
+    for_update_sql = ""
+    min_token_size = 1
+    Error = sqlite3.Error
+
+    def __init__(self, path=STORAGE['sqlite_path']):
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        register_sqlite_types()
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=STORAGE['sqlite_busy_timeout'],
+                detect_types=sqlite3.PARSE_DECLTYPES,
+                cached_statements=STORAGE['sqlite_cached_statements'],
+                check_same_thread=False, uri=self.path.startswith("file:"))
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode = WAL")
+            # Safe with WAL: a crash can lose the last commits, never corrupt
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.execute("PRAGMA temp_store = MEMORY")
+            self._local.connection = connection
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def initialize(self):
+        """Apply pending SQLITE_MIGRATIONS"""
+        connection = self._connect()
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        for migration in SQLITE_MIGRATIONS:
+            if migration['version'] <= version:
+                continue
+            print(f"Applying migration {migration['version']}: {migration['description']}")
+            try:
+                connection.executescript(migration['script'])
+            except sqlite3.OperationalError as e:
+                if 'fts5' not in str(e):
+                    raise
+                # Search then falls back to the in-process index
+                print(f"FTS5 is unavailable in this SQLite build: {e}")
+            connection.execute(f"PRAGMA user_version = {migration['version']}")
+            connection.commit()
+        print(f"Schema is at version {SQLITE_LATEST_VERSION} ({self.path})")
+
+    @contextmanager
+    def connection(self):
+        connection = _SQLiteConnection(self._connect())
+        if metrics.enabled:
+            connection = InstrumentedConnection(connection, metrics)
+        try:
+            yield connection
+        except Exception:
+            connection.rollback()
+            raise
+
+    def close(self):
+        with self._lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+    def fulltext_terms(self, tokens):
+        return [t for t in tokens if len(t) >= self.min_token_size]
+
+    def fulltext_query(self, terms, limit):
+        query = ("SELECT tasks.* FROM tasks_fts JOIN tasks ON tasks.id = tasks_fts.rowid "
+                 "WHERE tasks_fts MATCH %s ORDER BY bm25(tasks_fts) LIMIT %s")
+        return query, (self._match(terms), limit)
+
+    def fulltext_predicate(self, terms):
+        return "id IN (SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH %s)", (self._match(terms),)
+
+    def _match(self, terms):
+        # Every word is required and the last one is a prefix: "fix" "log"*
+        return " ".join(f'"{term}"' for term in terms) + "*"
+
+    def ordinal_sql(self, column, values):
+        return ordinal_case(column, values)
+
+    rank_sql = ordinal_sql
+
+    def is_fulltext_missing(self, error):
+        return isinstance(error, sqlite3.OperationalError) and 'tasks_fts' in str(error)
+
+    def bulk_load(self, rows):
+        # No LOAD DATA equivalent; executemany in one transaction is the fast path
+        return None
+
+
+class _SQLiteConnection:
+    """Gives a sqlite3 connection the mysql-connector calls TaskManager makes"""
+
+    unread_result = False
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def cursor(self, dictionary=False, buffered=True):
+        return _SQLiteCursor(self._connection.cursor(), dictionary)
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def consume_results(self):
+        pass
+
+    def close(self):
+        # The per-thread connection stays open for the next caller
+        pass
+
+
+class _SQLiteCursor:
+    def __init__(self, cursor, dictionary):
+        self._cursor = cursor
+        self._dictionary = dictionary
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, query, params=()):
+        self._cursor.execute(query.replace("%s", "?"), params)
+
+    def executemany(self, query, rows):
+        self._cursor.executemany(query.replace("%s", "?"), rows)
+
+    def _row(self, row):
+        if row is None:
+            return None
+        return dict(row) if self._dictionary else tuple(row)
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchmany(self, size):
+        return [self._row(row) for row in self._cursor.fetchmany(size)]
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def close(self):
+        self._cursor.close()
+
+
+_types_registered = False
+
+
+def register_sqlite_types():
+    # Explicit converters so DATE/TIMESTAMP columns come back as date and
+    # datetime objects, like they do from MySQL
+    global _types_registered
+    if _types_registered:
+        return
+    sqlite3.register_adapter(datetime.date, lambda value: value.isoformat())
+    sqlite3.register_adapter(datetime.datetime, lambda value: value.isoformat(" "))
+    sqlite3.register_converter("DATE", lambda value: datetime.date.fromisoformat(value.decode()))
+    sqlite3.register_converter(
+        "TIMESTAMP", lambda value: datetime.datetime.fromisoformat(value.decode()))
+    _types_registered = True
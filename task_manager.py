@@ -1,130 +1,793 @@
 """Task Manager - CRUD operations"""
-from database import get_connection
-from mysql.connector import Error
+import copy
+import datetime
+import itertools
+import threading
+import time
+from config import (PAGE_SIZE, STREAM_BATCH_SIZE, SEARCH_LIMIT, STATS_CACHE_TTL, BULK_CHUNK_SIZE,
+                    CHANGE_FEED, ARCHIVE)
+from search_index import InvertedIndex, tokenize
+from storage import get_backend
+
+STATUSES = ('pending', 'in_progress', 'completed')
+PRIORITIES = ('low', 'medium', 'high')
+# Columns shared by tasks and tasks_archive
+TASK_COLUMNS = "id, title, description, status, priority, due_date, created_at"
+
+
+def build_statistics(counts, overdue):
+    """Assemble the statistics dict from per-(status, priority) counts
+
+    `counts` rows carry status, priority and task_count; `overdue` rows carry
+    status and task_count for unfinished tasks past their due date.
+    """
+    stats = {
+        'total': 0,
+        'pending': 0,
+        'in_progress': 0,
+        'completed': 0,
+        'high_priority': 0,
+        'overdue': 0,
+        'by_priority_status': {
+            priority: {status: 0 for status in STATUSES} for priority in PRIORITIES
+        },
+        'overdue_by_status': {status: 0 for status in STATUSES},
+    }
+    for row in counts:
+        count = int(row['task_count'])
+        stats['total'] += count
+        stats[row['status']] += count
+        if row['priority'] == 'high':
+            stats['high_priority'] += count
+        stats['by_priority_status'][row['priority']][row['status']] += count
+    for row in overdue:
+        count = int(row['task_count'])
+        stats['overdue'] += count
+        stats['overdue_by_status'][row['status']] = count
+    return stats
+
+
+BULK_INSERT_QUERY = ("INSERT INTO tasks (title, description, status, priority, due_date) "
+                     "VALUES (%s, %s, %s, %s, %s)")
+
+
+def task_values(task):
+    """Column values for BULK_INSERT_QUERY from a task dict"""
+    return (task['title'], task.get('description'), task.get('status') or 'pending',
+            task.get('priority') or 'medium', task.get('due_date'))
+
+
+def chunked(iterable, size):
+    """Yield lists of at most size items"""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# Columns the task list may be ordered by; each has an index ending in id,
+# which breaks ties so keyset pagination is stable
+SORT_COLUMNS = ('created_at', 'due_date', 'priority', 'status', 'title', 'id')
+# Sorted by rank rather than alphabetically
+RANKED_COLUMNS = {'status': STATUSES, 'priority': PRIORITIES}
+
+
+class ReadError(list):
+    """Empty result of a read that failed
+
+    Behaves like [] for callers, but lets CachedTaskManager tell a failure
+    apart from a genuinely empty result.
+    """
+
+    def __init__(self, error):
+        super().__init__()
+        self.error = error
+
+
+def task_source(include_archived):
+    """Table to read from; archived rows are merged in only on request"""
+    if not include_archived:
+        return "tasks"
+    return (f"(SELECT {TASK_COLUMNS}, 0 AS archived FROM tasks UNION ALL "
+            f"SELECT {TASK_COLUMNS}, 1 AS archived FROM tasks_archive) AS all_tasks")
+
+
+def _as_tuple(value):
+    if value is None or isinstance(value, (tuple, list, set, frozenset)):
+        return tuple(value or ())
+    return (value,)
+
+
+class TaskQuery:
+    """Filters and sort order for TaskManager.query_tasks()
+
+    Every filter is optional and they combine with AND. `status` and
+    `priority` take one value or several; `due_from`/`due_to` bound the due
+    date inclusively; `overdue` keeps unfinished tasks past their due date;
+    `text` matches title and description like search_tasks(). Tasks without
+    a due date sort before all others. With `include_archived`, rows from
+    tasks_archive are merged in and carry archived=1.
+    """
+
+    def __init__(self, status=None, priority=None, due_from=None, due_to=None,
+                 overdue=False, text=None, order_by='created_at', descending=True,
+                 include_archived=False):
+        if order_by not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by {order_by!r}; choose from {SORT_COLUMNS}")
+        self.status = _as_tuple(status)
+        self.priority = _as_tuple(priority)
+        for value in self.status:
+            if value not in STATUSES:
+                raise ValueError(f"Unknown status: {value!r}")
+        for value in self.priority:
+            if value not in PRIORITIES:
+                raise ValueError(f"Unknown priority: {value!r}")
+        self.due_from = due_from
+        self.due_to = due_to
+        self.overdue = overdue
+        self.text = (text or "").strip() or None
+        self.order_by = order_by
+        self.descending = descending
+        self.include_archived = include_archived
+
+    def _key(self):
+        return (self.status, self.priority, self.due_from, self.due_to, self.overdue,
+                self.text, self.order_by, self.descending, self.include_archived)
+
+    # Hashable so CachedTaskManager can key results on the query
+    def __eq__(self, other):
+        return isinstance(other, TaskQuery) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __repr__(self):
+        return f"TaskQuery{self._key()!r}"
+
+    def matches(self, task):
+        """Whether a task row passes the filters, or None if only the database can tell"""
+        if self.status and task['status'] not in self.status:
+            return False
+        if self.priority and task['priority'] not in self.priority:
+            return False
+        due = str(task['due_date']) if task.get('due_date') else None
+        if self.due_from is not None and (due is None or due < str(self.due_from)):
+            return False
+        if self.due_to is not None and (due is None or due > str(self.due_to)):
+            return False
+        if self.overdue and (due is None or task['status'] == 'completed'
+                             or due >= datetime.date.today().isoformat()):
+            return False
+        if self.text:
+            return None
+        return True
+
+    def cursor_for(self, task):
+        """Keyset cursor (sort value, id) positioned after `task`"""
+        value = task[self.order_by]
+        if self.order_by in RANKED_COLUMNS and value is not None:
+            value = RANKED_COLUMNS[self.order_by].index(value) + 1
+        return value, task['id']
 
 
 class TaskManager:
-    
+
+    def __init__(self, backend=None):
+        # MySQL or embedded SQLite, per STORAGE['backend'] in config.py
+        self.backend = backend if backend is not None else get_backend()
+        # Search goes through the full-text index until the backend reports it
+        # missing; only then is the in-process index built and maintained
+        self._use_fulltext = True
+        self._search_index = None
+        self._search_index_lock = threading.Lock()
+        # include_archived -> (monotonic time, stats) of the last counters read
+        self._stats_snapshot = {}
+        # Error that cut the last add_tasks()/bulk_load() short, if any
+        self.last_bulk_error = None
+
+    def initialize(self):
+        """Create or migrate the schema in the configured storage backend"""
+        self.backend.initialize()
+
     def add_task(self, title, description, priority='medium', due_date=None):
         """Create a new task"""
-        connection = get_connection()
-        if connection:
-            try:
+        try:
+            with self.backend.connection() as connection:
                 cursor = connection.cursor()
                 query = "INSERT INTO tasks (title, description, priority, due_date) VALUES (%s, %s, %s, %s)"
                 cursor.execute(query, (title, description, priority, due_date))
                 connection.commit()
+                task_id = cursor.lastrowid
+                cursor.close()
+            self.invalidate_statistics()
+            if self._search_index is not None:
+                self._search_index.add(task_id, title, description)
+            return True
+        except self.backend.Error as e:
+            print(f"Error adding task: {e}")
+            return False
+
+    def add_tasks(self, tasks, chunk_size=BULK_CHUNK_SIZE):
+        """Create many tasks with one multi-row INSERT and commit per chunk
+
+        `tasks` yields dicts with a title and optional description, status,
+        priority and due_date. Returns the number of rows inserted; chunks
+        committed before an error are kept and the error is left in
+        last_bulk_error.
+        """
+        rows = (task_values(task) for task in tasks)
+        inserted = 0
+        self.last_bulk_error = None
+        try:
+            with self.backend.connection() as connection:
+                cursor = connection.cursor()
+                for chunk in chunked(rows, chunk_size):
+                    # The connector rewrites executemany INSERTs into one
+                    # multi-row VALUES statement
+                    cursor.executemany(BULK_INSERT_QUERY, chunk)
+                    connection.commit()
+                    inserted += len(chunk)
                 cursor.close()
-                connection.close()
-                return True
-            except Error as e:
-                print(f"Error adding task: {e}")
-                return False
-    
-    def view_all_tasks(self):
+        except self.backend.Error as e:
+            print(f"Error adding tasks: {e}")
+            self.last_bulk_error = e
+        if inserted:
+            self.invalidate_bulk_write()
+        return inserted
+
+    def bulk_load(self, tasks):
+        """Load a list of tasks through the backend's bulk path
+
+        On MySQL this is LOAD DATA LOCAL INFILE, much faster than INSERT for
+        large imports but needing local_infile enabled on the server. Falls
+        back to add_tasks() where there is no such path. Returns the number
+        of rows loaded.
+        """
+        self.last_bulk_error = None
+        if not tasks:
+            return 0
+        try:
+            loaded = self.backend.bulk_load([task_values(task) for task in tasks])
+        except self.backend.Error as e:
+            print(f"Error loading tasks: {e}")
+            self.last_bulk_error = e
+            return 0
+        if loaded is None:
+            return self.add_tasks(tasks)
+        self.invalidate_bulk_write()
+        return loaded
+
+    def invalidate_bulk_write(self):
+        """Drop derived state after writes whose ids are not known"""
+        self.invalidate_statistics()
+        # New ids are not reliably consecutive, so rebuild on next search
+        self._search_index = None
+
+    def view_all_tasks(self, include_archived=False):
         """Read all tasks"""
-        connection = get_connection()
-        if connection:
-            try:
+        try:
+            with self.backend.connection() as connection:
                 cursor = connection.cursor(dictionary=True)
-                cursor.execute("SELECT * FROM tasks ORDER BY created_at DESC")
+                cursor.execute(f"SELECT * FROM {task_source(include_archived)} "
+                               "ORDER BY created_at DESC, id DESC")
                 tasks = cursor.fetchall()
                 cursor.close()
-                connection.close()
                 return tasks
-            except Error as e:
-                print(f"Error fetching tasks: {e}")
-                return []
-        return []
-    
+        except self.backend.Error as e:
+            print(f"Error fetching tasks: {e}")
+            return ReadError(e)
+
+    def get_tasks_page(self, limit=PAGE_SIZE, after=None, include_archived=False):
+        """Read one page of tasks, newest first
+
+        `after` is the (created_at, id) cursor of the last row already shown.
+        Returns (tasks, next_cursor); next_cursor is None on the last page.
+        """
+        if include_archived:
+            return self.query_tasks(TaskQuery(include_archived=True), limit, after)
+        try:
+            with self.backend.connection() as connection:
+                cursor = connection.cursor(dictionary=True)
+                if after is None:
+                    query = "SELECT * FROM tasks ORDER BY created_at DESC, id DESC LIMIT %s"
+                    params = (limit,)
+                else:
+                    created_at, task_id = after
+                    query = ("SELECT * FROM tasks "
+                             "WHERE created_at < %s OR (created_at = %s AND id < %s) "
+                             "ORDER BY created_at DESC, id DESC LIMIT %s")
+                    params = (created_at, created_at, task_id, limit)
+                cursor.execute(query, params)
+                tasks = cursor.fetchall()
+                cursor.close()
+        except self.backend.Error as e:
+            print(f"Error fetching tasks: {e}")
+            return ReadError(e), None
+        next_cursor = None
+        if len(tasks) == limit:
+            next_cursor = (tasks[-1]['created_at'], tasks[-1]['id'])
+        return tasks, next_cursor
+
+    def iter_task_batches(self, batch_size=STREAM_BATCH_SIZE, include_archived=False):
+        """Stream every task, newest first, in lists of at most batch_size rows
+
+        Rows come from an unbuffered cursor, so memory use is bounded by one
+        batch regardless of table size.
+        """
+        with self.backend.connection() as connection:
+            cursor = connection.cursor(dictionary=True, buffered=False)
+            try:
+                cursor.execute(f"SELECT * FROM {task_source(include_archived)} "
+                               "ORDER BY created_at DESC, id DESC")
+                while True:
+                    batch = cursor.fetchmany(batch_size)
+                    if not batch:
+                        break
+                    yield batch
+            finally:
+                # The protocol requires draining the result before reusing the
+                # connection, e.g. when the caller stops iterating early
+                if connection.unread_result:
+                    connection.consume_results()
+                cursor.close()
+
     def update_task_status(self, task_id, status):
         """Update task status"""
-        connection = get_connection()
-        if connection:
-            try:
+        try:
+            with self.backend.connection() as connection:
                 cursor = connection.cursor()
                 query = "UPDATE tasks SET status = %s WHERE id = %s"
                 cursor.execute(query, (status, task_id))
                 connection.commit()
                 success = cursor.rowcount > 0
                 cursor.close()
-                connection.close()
-                return success
-            except Error as e:
-                print(f"Error updating task: {e}")
-                return False
-    
+            self.invalidate_statistics()
+            return success
+        except self.backend.Error as e:
+            print(f"Error updating task: {e}")
+            return False
+
     def delete_task(self, task_id):
         """Delete a task"""
-        connection = get_connection()
-        if connection:
-            try:
+        try:
+            with self.backend.connection() as connection:
                 cursor = connection.cursor()
-                query = "DELETE FROM tasks WHERE id = %s"
-                cursor.execute(query, (task_id,))
-                connection.commit()
+                cursor.execute("DELETE FROM tasks WHERE id = %s", (task_id,))
                 success = cursor.rowcount > 0
+                if not success:
+                    cursor.execute("DELETE FROM tasks_archive WHERE id = %s", (task_id,))
+                    success = cursor.rowcount > 0
+                connection.commit()
                 cursor.close()
-                connection.close()
-                return success
-            except Error as e:
-                print(f"Error deleting task: {e}")
-                return False
-
-    def search_tasks(self, search_term):
-        """Search tasks by title"""
-        connection = get_connection()
-        if connection:
-            try:
-                cursor = connection.cursor(dictionary=True)
-                query = "SELECT * FROM tasks WHERE title LIKE %s ORDER BY created_at DESC"
-                cursor.execute(query, (f"%{search_term}%",))
-                tasks = cursor.fetchall()
+            self.invalidate_statistics()
+            if success and self._search_index is not None:
+                self._search_index.remove(task_id)
+            return success
+        except self.backend.Error as e:
+            print(f"Error deleting task: {e}")
+            return False
+
+    def update_status_many(self, task_ids, status, chunk_size=BULK_CHUNK_SIZE):
+        """Set the status of many tasks, one transaction per chunk of ids
+
+        Returns the number of rows changed.
+        """
+        updated = 0
+        try:
+            with self.backend.connection() as connection:
+                cursor = connection.cursor()
+                for chunk in chunked(task_ids, chunk_size):
+                    placeholders = ", ".join(["%s"] * len(chunk))
+                    query = f"UPDATE tasks SET status = %s WHERE id IN ({placeholders})"
+                    cursor.execute(query, [status] + chunk)
+                    connection.commit()
+                    updated += cursor.rowcount
                 cursor.close()
-                connection.close()
-                return tasks
-            except Error as e:
-                print(f"Error searching tasks: {e}")
-                return []
-        return []
-    
-    def filter_by_status(self, status):
+        except self.backend.Error as e:
+            print(f"Error updating tasks: {e}")
+        if updated:
+            self.invalidate_statistics()
+        return updated
+
+    def delete_many(self, task_ids, chunk_size=BULK_CHUNK_SIZE):
+        """Delete many tasks, one transaction per chunk of ids
+
+        Returns the number of rows deleted.
+        """
+        deleted = 0
+        try:
+            with self.backend.connection() as connection:
+                cursor = connection.cursor()
+                for chunk in chunked(task_ids, chunk_size):
+                    placeholders = ", ".join(["%s"] * len(chunk))
+                    cursor.execute(f"DELETE FROM tasks WHERE id IN ({placeholders})", chunk)
+                    deleted += cursor.rowcount
+                    cursor.execute(f"DELETE FROM tasks_archive WHERE id IN ({placeholders})", chunk)
+                    deleted += cursor.rowcount
+                    connection.commit()
+                    if self._search_index is not None:
+                        for task_id in chunk:
+                            self._search_index.remove(task_id)
+                cursor.close()
+        except self.backend.Error as e:
+            print(f"Error deleting tasks: {e}")
+        if deleted:
+            self.invalidate_statistics()
+        return deleted
+
+    def search_tasks(self, search_term, limit=SEARCH_LIMIT):
+        """Search tasks by title and description, best matches first
+
+        The last word matches as a prefix, so partial input works for
+        search-as-you-type.
+        """
+        try:
+            if self._use_fulltext:
+                terms = self.backend.fulltext_terms(tokenize(search_term))
+                if not terms:
+                    return self._title_search(search_term, limit)
+                try:
+                    return self._fulltext_search(terms, limit)
+                except self.backend.Error as e:
+                    if not self.backend.is_fulltext_missing(e):
+                        raise
+                    print("Full-text index missing, falling back to in-process search index")
+                    self._use_fulltext = False
+            return self._index_search(search_term, limit)
+        except self.backend.Error as e:
+            print(f"Error searching tasks: {e}")
+            return ReadError(e)
+
+    def _title_search(self, search_term, limit):
+        with self.backend.connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            query = "SELECT * FROM tasks WHERE title LIKE %s ORDER BY created_at DESC LIMIT %s"
+            cursor.execute(query, (f"%{search_term}%", limit))
+            tasks = cursor.fetchall()
+            cursor.close()
+            return tasks
+
+    def _fulltext_search(self, terms, limit):
+        # Every word is required and the last one matches as a prefix
+        query, params = self.backend.fulltext_query(terms, limit)
+        with self.backend.connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute(query, params)
+            tasks = cursor.fetchall()
+            cursor.close()
+            return tasks
+
+    def _get_search_index(self):
+        """Build the in-process index from a streaming scan on first use"""
+        with self._search_index_lock:
+            if self._search_index is None:
+                index = InvertedIndex()
+                for batch in self.iter_task_batches():
+                    for task in batch:
+                        index.add(task['id'], task['title'], task['description'])
+                self._search_index = index
+            return self._search_index
+
+    def _index_search(self, search_term, limit):
+        ranked = self._get_search_index().search(search_term, limit)
+        if not ranked:
+            return []
+        ids = [task_id for task_id, _ in ranked]
+        with self.backend.connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            placeholders = ", ".join(["%s"] * len(ids))
+            cursor.execute(f"SELECT * FROM tasks WHERE id IN ({placeholders})", ids)
+            rows = {task['id']: task for task in cursor.fetchall()}
+            cursor.close()
+        return [rows[task_id] for task_id in ids if task_id in rows]
+
+    def filter_by_status(self, status, include_archived=False):
         """Filter tasks by status"""
-        connection = get_connection()
-        if connection:
-            try:
+        try:
+            with self.backend.connection() as connection:
                 cursor = connection.cursor(dictionary=True)
-                query = "SELECT * FROM tasks WHERE status = %s ORDER BY created_at DESC"
+                query = (f"SELECT * FROM {task_source(include_archived)} "
+                         "WHERE status = %s ORDER BY created_at DESC")
                 cursor.execute(query, (status,))
                 tasks = cursor.fetchall()
                 cursor.close()
-                connection.close()
                 return tasks
-            except Error as e:
-                print(f"Error filtering tasks: {e}")
-                return []
-        return []
-    
-    def get_statistics(self):
-        """Get task statistics"""
-        connection = get_connection()
-        if connection:
+        except self.backend.Error as e:
+            print(f"Error filtering tasks: {e}")
+            return ReadError(e)
+
+    def query_tasks(self, query, limit=PAGE_SIZE, after=None):
+        """Read one page of tasks matching a TaskQuery, in its sort order
+
+        Filtering, sorting and paging all happen in the database with bound
+        parameters. `after` is the cursor returned with the previous page.
+        Returns (tasks, next_cursor); next_cursor is None on the last page.
+        """
+        try:
             try:
+                sql, params = self._build_query(query, limit, after)
+                tasks = self._fetch(sql, params)
+            except self.backend.Error as e:
+                if not (query.text and self._use_fulltext and self.backend.is_fulltext_missing(e)):
+                    raise
+                print("Full-text index missing, matching text with LIKE")
+                self._use_fulltext = False
+                sql, params = self._build_query(query, limit, after)
+                tasks = self._fetch(sql, params)
+        except self.backend.Error as e:
+            print(f"Error querying tasks: {e}")
+            return ReadError(e), None
+        for task in tasks:
+            task.pop('sort_key', None)
+        next_cursor = None
+        if len(tasks) == limit:
+            next_cursor = query.cursor_for(tasks[-1])
+        return tasks, next_cursor
+
+    def _fetch(self, sql, params):
+        with self.backend.connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute(sql, params)
+            tasks = cursor.fetchall()
+            cursor.close()
+            return tasks
+
+    def _build_query(self, query, limit, after):
+        """Parameterized SQL for a TaskQuery page; only whitelisted names are inlined"""
+        column = query.order_by
+        key = column
+        if column in RANKED_COLUMNS:
+            key = self.backend.ordinal_sql(column, RANKED_COLUMNS[column])
+        direction = "DESC" if query.descending else "ASC"
+        if column == 'id':
+            order = f"id {direction}"
+        else:
+            order = f"{key} {direction}, id {direction}"
+
+        if not query.include_archived:
+            where, params = self._query_filters(query, after, key, 'tasks')
+            return f"SELECT * FROM tasks{where} ORDER BY {order} LIMIT %s", params + [limit]
+
+        # Each table contributes at most `limit` rows already in order, so the
+        # hot table still pages through its index and only 2 * limit rows
+        # are merged. UNION turns ENUMs into strings, hence the sort_key.
+        sort_key = column
+        if column in RANKED_COLUMNS:
+            sort_key = self.backend.rank_sql(column, RANKED_COLUMNS[column])
+        branches, params = [], []
+        for table, archived in (('tasks', 0), ('tasks_archive', 1)):
+            where, table_params = self._query_filters(query, after, key, table)
+            branches.append(f"SELECT * FROM (SELECT {TASK_COLUMNS}, {sort_key} AS sort_key, "
+                            f"{archived} AS archived FROM {table}{where} "
+                            f"ORDER BY {order} LIMIT %s) AS {table}_page")
+            params.extend(table_params + [limit])
+        sql = (f"SELECT * FROM ({' UNION ALL '.join(branches)}) AS merged "
+               f"ORDER BY sort_key {direction}, id {direction} LIMIT %s")
+        return sql, params + [limit]
+
+    def _query_filters(self, query, after, key, table):
+        """WHERE clause and parameters for a TaskQuery page of one table"""
+        where, params = [], []
+        if query.status:
+            where.append(f"status IN ({', '.join(['%s'] * len(query.status))})")
+            params.extend(query.status)
+        if query.priority:
+            where.append(f"priority IN ({', '.join(['%s'] * len(query.priority))})")
+            params.extend(query.priority)
+        if query.due_from is not None:
+            where.append("due_date >= %s")
+            params.append(query.due_from)
+        if query.due_to is not None:
+            where.append("due_date <= %s")
+            params.append(query.due_to)
+        if query.overdue:
+            where.append(f"due_date < {self.backend.today_sql} AND status <> 'completed'")
+        if query.text:
+            terms = self.backend.fulltext_terms(tokenize(query.text))
+            # The archive has no full-text index; it is searched with LIKE
+            if terms and self._use_fulltext and table == 'tasks':
+                predicate, predicate_params = self.backend.fulltext_predicate(terms)
+                where.append(predicate)
+                params.extend(predicate_params)
+            else:
+                where.append("(title LIKE %s OR description LIKE %s)")
+                params.extend([f"%{query.text}%"] * 2)
+
+        if after is not None:
+            column = query.order_by
+            value, task_id = after
+            op = "<" if query.descending else ">"
+            if column == 'id':
+                where.append(f"id {op} %s")
+                params.append(task_id)
+            elif value is None:
+                # NULLs sort first: descending they are the tail, ascending the head
+                where.append(f"({column} IS NULL AND id < %s)" if query.descending
+                             else f"({column} IS NOT NULL OR id > %s)")
+                params.append(task_id)
+            else:
+                nulls = f" OR {column} IS NULL" if query.descending and column == 'due_date' else ""
+                where.append(f"({key} {op} %s OR ({key} = %s AND id {op} %s){nulls})")
+                params.extend([value, value, task_id])
+        return (" WHERE " + " AND ".join(where) if where else ""), params
+
+    def latest_change_id(self):
+        """Id of the newest task_changes row, the starting point for get_changes()"""
+        try:
+            with self.backend.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute("SELECT MAX(change_id) FROM task_changes")
+                latest = cursor.fetchone()[0]
+                cursor.close()
+                return latest or 0
+        except self.backend.Error as e:
+            print(f"Error reading change feed: {e}")
+            return 0
+
+    def get_changes(self, since, limit=CHANGE_FEED['batch_size'], gaps=()):
+        """Changes made by any client after change id `since`, oldest first
+
+        Each change is a dict with change_id, task_id, op ('insert', 'update'
+        or 'delete') and task, the task's current row or None once deleted.
+        `gaps` lists (first, last) id ranges at or below `since` to re-check
+        for changes that committed late; they are read by a query of their
+        own, so up to `limit` new changes and `limit` late ones come back.
+        Returns (changes, last_change_id); changes is None when the feed was
+        pruned past `since` and the caller has to reload everything.
+        """
+        select = ("SELECT c.change_id, c.task_id AS changed_task_id, c.op, t.* "
+                  "FROM task_changes c LEFT JOIN tasks t ON t.id = c.task_id WHERE ")
+        with self.backend.connection() as connection:
+            cursor = connection.cursor(dictionary=True)
+            rows = []
+            if gaps:
+                ranges = " OR ".join(["c.change_id BETWEEN %s AND %s"] * len(gaps))
+                cursor.execute(select + f"({ranges}) ORDER BY c.change_id LIMIT %s",
+                               [bound for gap in gaps for bound in gap] + [limit])
+                rows = cursor.fetchall()
+            cursor.execute(select + "c.change_id > %s ORDER BY c.change_id LIMIT %s",
+                           (since, limit))
+            rows += cursor.fetchall()
+            pruned = False
+            new_ids = [row['change_id'] for row in rows if row['change_id'] > since]
+            if since and new_ids and new_ids[0] > since + 1:
+                cursor.execute("SELECT MIN(change_id) AS first_id FROM task_changes")
+                pruned = cursor.fetchone()['first_id'] > since + 1
+            cursor.close()
+        last_id = max(new_ids, default=since)
+        if pruned:
+            self.invalidate_bulk_write()
+            return None, last_id
+        changes = []
+        for row in rows:
+            change_id, task_id, op = row.pop('change_id'), row.pop('changed_task_id'), row.pop('op')
+            changes.append({'change_id': change_id, 'task_id': task_id, 'op': op,
+                            'task': row if row['id'] is not None else None})
+        if changes:
+            self._apply_changes_to_index(changes)
+            self.invalidate_statistics()
+        return changes, last_id
+
+    def _apply_changes_to_index(self, changes):
+        index = self._search_index
+        if index is None:
+            return
+        for change in changes:
+            task = change['task']
+            if task is None:
+                index.remove(change['task_id'])
+            else:
+                index.update(task['id'], task['title'], task['description'])
+
+    def prune_changes(self, retention_hours=CHANGE_FEED['retention_hours'],
+                      chunk_size=BULK_CHUNK_SIZE):
+        """Delete change-feed rows older than retention_hours, one chunk per transaction
+
+        Returns the number of rows deleted.
+        """
+        cutoff = datetime.datetime.now() - datetime.timedelta(hours=retention_hours)
+        deleted = 0
+        try:
+            with self.backend.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute("SELECT MIN(change_id), MAX(change_id) FROM task_changes "
+                               "WHERE changed_at < %s", (cutoff,))
+                first, last = cursor.fetchone()
+                if first is not None:
+                    # Short id-range deletes keep the feed writable meanwhile
+                    for upper in range(first + chunk_size - 1, last + chunk_size, chunk_size):
+                        cursor.execute("DELETE FROM task_changes WHERE change_id <= %s",
+                                       (min(upper, last),))
+                        connection.commit()
+                        deleted += cursor.rowcount
+                cursor.close()
+        except self.backend.Error as e:
+            print(f"Error pruning change feed: {e}")
+        return deleted
+
+    def archive_completed(self, older_than_days=ARCHIVE['age_days'],
+                          batch_size=ARCHIVE['batch_size'],
+                          max_batches=ARCHIVE['max_batches'], pause=ARCHIVE['pause']):
+        """Move completed tasks created over older_than_days ago into tasks_archive
+
+        Each batch copies and deletes at most batch_size rows in one short
+        transaction, oldest first, then sleeps for `pause` so interactive
+        writes are not starved. Returns the number of tasks archived.
+        """
+        cutoff = datetime.datetime.now() - datetime.timedelta(days=older_than_days)
+        condition = "status = 'completed' AND created_at < %s"
+        archived = 0
+        try:
+            with self.backend.connection() as connection:
+                cursor = connection.cursor()
+                for _ in range(max_batches):
+                    cursor.execute(f"SELECT id FROM tasks WHERE {condition} "
+                                   f"ORDER BY created_at, id LIMIT %s{self.backend.for_update_sql}",
+                                   (cutoff, batch_size))
+                    ids = [row[0] for row in cursor.fetchall()]
+                    if not ids:
+                        connection.commit()
+                        break
+                    placeholders = ", ".join(["%s"] * len(ids))
+                    cursor.execute(f"INSERT INTO tasks_archive ({TASK_COLUMNS}) "
+                                   f"SELECT {TASK_COLUMNS} FROM tasks "
+                                   f"WHERE id IN ({placeholders}) AND {condition}",
+                                   ids + [cutoff])
+                    cursor.execute(f"DELETE FROM tasks WHERE id IN ({placeholders}) AND {condition}",
+                                   ids + [cutoff])
+                    archived += cursor.rowcount
+                    connection.commit()
+                    if self._search_index is not None:
+                        for task_id in ids:
+                            self._search_index.remove(task_id)
+                    if len(ids) < batch_size:
+                        break
+                    time.sleep(pause)
+                cursor.close()
+        except self.backend.Error as e:
+            print(f"Error archiving tasks: {e}")
+        if archived:
+            self.invalidate_statistics()
+        return archived
+
+    def get_statistics(self, use_cache=True, include_archived=False):
+        """Get task statistics
+
+        Reads the trigger-maintained task_stats and task_due_stats counters,
+        so the cost does not grow with the number of tasks. The snapshot is
+        reused for STATS_CACHE_TTL seconds unless a write invalidates it.
+        Archived tasks are completed, so they only add to the counts.
+        """
+        snapshot = self._stats_snapshot.get(include_archived)
+        if use_cache and snapshot is not None:
+            taken_at, stats = snapshot
+            if time.monotonic() - taken_at < STATS_CACHE_TTL:
+                return copy.deepcopy(stats)
+        try:
+            with self.backend.connection() as connection:
                 cursor = connection.cursor(dictionary=True)
-                cursor.execute("""
-                    SELECT 
-                        COUNT(*) as total,
-                        SUM(CASE WHEN status = 'pending' THEN 1 ELSE 0 END) as pending,
-                        SUM(CASE WHEN status = 'in_progress' THEN 1 ELSE 0 END) as in_progress,
-                        SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) as completed,
-                        SUM(CASE WHEN priority = 'high' THEN 1 ELSE 0 END) as high_priority
-                    FROM tasks
+                cursor.execute("SELECT status, priority, task_count FROM task_stats")
+                counts = cursor.fetchall()
+                if include_archived:
+                    cursor.execute("SELECT status, priority, task_count FROM task_archive_stats")
+                    counts += cursor.fetchall()
+                cursor.execute(f"""
+                    SELECT status, SUM(task_count) as task_count
+                    FROM task_due_stats
+                    WHERE due_date < {self.backend.today_sql} AND status <> 'completed'
+                    GROUP BY status
                 """)
-                stats = cursor.fetchone()
+                overdue = cursor.fetchall()
                 cursor.close()
-                connection.close()
-                return stats
-            except Error as e:
-                print(f"Error getting statistics: {e}")
-                return None
-        return None
+        except self.backend.Error as e:
+            print(f"Error getting statistics: {e}")
+            return None
+        stats = build_statistics(counts, overdue)
+        self._stats_snapshot[include_archived] = (time.monotonic(), stats)
+        return copy.deepcopy(stats)
+
+    def invalidate_statistics(self):
+        """Drop the cached statistics snapshots"""
+        self._stats_snapshot = {}
@@ -0,0 +1,98 @@
+"""ChangeFeed delivery against the embedded SQLite backend, without Tk"""
+import pytest
+
+from change_feed import ChangeFeed
+from storage import SQLiteBackend
+from task_manager import TaskManager
+
+
+class FakeRoot:
+    """Records the one pending after() job instead of running an event loop"""
+
+    def __init__(self):
+        self.job = None
+
+    def after(self, delay, callback):
+        self.job = (delay, callback)
+        return callback
+
+    def after_cancel(self, job):
+        self.job = None
+
+
+class InlineExecutor:
+    def submit(self, fn, *args, on_success=None, on_error=None, key=None, quiet=False):
+        try:
+            result = fn(*args)
+        except Exception as e:
+            on_error(e)
+        else:
+            on_success(result)
+
+    def cancel(self, key):
+        pass
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = TaskManager(SQLiteBackend(str(tmp_path / 'tasks.db')))
+    manager.initialize()
+    return manager
+
+
+def run_feed(manager, batch_size, last_id=0):
+    root = FakeRoot()
+    delivered = []
+    feed = ChangeFeed(root, InlineExecutor(), manager,
+                      on_changes=lambda changes: delivered.extend(c['change_id'] for c in changes),
+                      on_resync=lambda: pytest.fail("unexpected resync"),
+                      interval_ms=1000, batch_size=batch_size)
+    feed.start(last_id)
+
+    def poll(max_polls=50):
+        """Run polls until the feed waits for the interval; returns the poll count"""
+        for polls in range(1, max_polls + 1):
+            _, callback = root.job
+            callback()
+            if root.job[0] != 0:
+                return polls
+        pytest.fail("feed kept re-polling immediately")
+    return feed, delivered, poll
+
+
+def execute(manager, query, params=()):
+    with manager.backend.connection() as connection:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(query, params)
+        rows = cursor.fetchall() if cursor.description else None
+        connection.commit()
+        cursor.close()
+    return rows
+
+
+def test_new_changes_are_delivered_in_batches(manager):
+    feed, delivered, poll = run_feed(manager, batch_size=5)
+    manager.add_tasks([{'title': f"task {i}"} for i in range(12)])
+    assert poll() == 3
+    assert delivered == list(range(1, 13))
+    assert feed.last_id == 12
+
+
+def test_late_commits_larger_than_a_batch_all_arrive(manager):
+    manager.add_tasks([{'title': f"task {i}"} for i in range(20)])
+    # Changes 2-13 belong to a transaction that has not committed yet
+    late = execute(manager, "SELECT * FROM task_changes WHERE change_id BETWEEN 2 AND 13")
+    execute(manager, "DELETE FROM task_changes WHERE change_id BETWEEN 2 AND 13")
+    feed, delivered, poll = run_feed(manager, batch_size=5)
+    poll()
+    assert delivered == [1] + list(range(14, 21))
+
+    for row in late:
+        execute(manager, "INSERT INTO task_changes (change_id, task_id, op) VALUES (%s, %s, %s)",
+                (row['change_id'], row['task_id'], row['op']))
+    manager.add_task("after the gap", "")
+    assert poll() <= 4
+    assert sorted(delivered) == list(range(1, 22))
+    assert len(delivered) == len(set(delivered))
+    assert feed.last_id == 21
+    assert feed._gaps == []
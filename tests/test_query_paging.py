@@ -0,0 +1,86 @@
+"""Keyset paging of TaskQuery against the embedded SQLite backend
+
+Every page is fetched through the cursor of the previous one; stitched
+together they must equal the same query read in one go.
+"""
+import datetime
+
+import pytest
+
+from storage import SQLiteBackend
+from task_manager import PRIORITIES, SORT_COLUMNS, STATUSES, TaskManager, TaskQuery
+
+TASK_COUNT = 60
+PAGE = 7
+
+
+@pytest.fixture(scope='module')
+def manager(tmp_path_factory):
+    manager = TaskManager(SQLiteBackend(str(tmp_path_factory.mktemp('db') / 'tasks.db')))
+    manager.initialize()
+    today = datetime.date.today()
+    manager.add_tasks([
+        {
+            # Repeated titles, statuses and due dates force the id tie-break
+            'title': f"task {i % 9}",
+            'description': "alpha" if i % 2 else "beta",
+            'status': STATUSES[i % 3],
+            'priority': PRIORITIES[i % 4 % 3],
+            'due_date': (None if i % 5 == 0
+                         else (today + datetime.timedelta(days=i % 7 - 3)).isoformat()),
+        }
+        for i in range(TASK_COUNT)
+    ])
+    # Shared timestamps, and old completed tasks for the archive
+    old = datetime.datetime.now() - datetime.timedelta(days=400)
+    with manager.backend.connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute("UPDATE tasks SET created_at = %s WHERE id % 4 = 0", (old,))
+        connection.commit()
+        cursor.close()
+    assert manager.archive_completed(older_than_days=90, batch_size=4, pause=0) > 0
+    return manager
+
+
+def read_paged(manager, query):
+    tasks, after = manager.query_tasks(query, PAGE)
+    while after is not None:
+        page, after = manager.query_tasks(query, PAGE, after)
+        tasks += page
+    return tasks
+
+
+@pytest.mark.parametrize('include_archived', [False, True])
+@pytest.mark.parametrize('descending', [False, True])
+@pytest.mark.parametrize('order_by', SORT_COLUMNS)
+def test_paged_matches_unpaged(manager, order_by, descending, include_archived):
+    query = TaskQuery(order_by=order_by, descending=descending, include_archived=include_archived)
+    unpaged, after = manager.query_tasks(query, TASK_COUNT * 2)
+    assert after is None
+    paged = read_paged(manager, query)
+    assert [task['id'] for task in paged] == [task['id'] for task in unpaged]
+    keys = [query.cursor_for(task) for task in paged]
+    # NULL due dates sort first
+    keys = [(value is not None, value, task_id) for value, task_id in keys]
+    assert keys == sorted(keys, reverse=descending)
+
+
+def test_archived_rows_are_included_only_on_request(manager):
+    hot = read_paged(manager, TaskQuery())
+    every = read_paged(manager, TaskQuery(include_archived=True))
+    assert len(every) == TASK_COUNT
+    assert len(hot) < TASK_COUNT
+    assert {task['id'] for task in every if task['archived']} == \
+        {task['id'] for task in every} - {task['id'] for task in hot}
+
+
+@pytest.mark.parametrize('include_archived', [False, True])
+def test_filters_apply_to_every_page(manager, include_archived):
+    query = TaskQuery(status=('pending', 'completed'), text="alpha", order_by='priority',
+                      include_archived=include_archived)
+    paged = read_paged(manager, query)
+    assert paged
+    assert [task['id'] for task in paged] == \
+        [task['id'] for task in manager.query_tasks(query, TASK_COUNT * 2)[0]]
+    assert all(task['status'] in query.status and task['description'] == "alpha"
+               for task in paged)
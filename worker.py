@@ -0,0 +1,122 @@
+"""Background execution of blocking calls for the Tkinter GUI"""
+import queue
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BackgroundExecutor:
+    """Thread pool whose results are delivered back on the Tk main loop
+
+    Callbacks run from a root.after() poll, so they may touch widgets.
+    Jobs submitted with the same `key` supersede each other: a queued job is
+    cancelled outright and a running one has its result discarded.
+    """
+
+    POLL_MS = 16  # one frame at 60fps
+
+    def __init__(self, root, max_workers=4, on_busy_change=None):
+        self.root = root
+        self.on_busy_change = on_busy_change
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-worker")
+        self._results = queue.Queue()
+        self._posted = queue.Queue()
+        self._latest = {}   # key -> most recent future for that key
+        self._pending = 0
+        self._busy = False
+        self._closed = False
+        self._poll()
+
+    @property
+    def busy(self):
+        return self._pending > 0
+
+    def submit(self, fn, *args, on_success=None, on_error=None, key=None, quiet=False, **kwargs):
+        """Run fn(*args, **kwargs) on a worker thread
+
+        on_success(result) or on_error(exception) is later called on the Tk
+        thread unless the job was cancelled or superseded. Quiet jobs, such
+        as periodic polls, do not count towards `busy`.
+        """
+        future = self._pool.submit(fn, *args, **kwargs)
+        if key is not None:
+            previous = self._latest.get(key)
+            if previous is not None:
+                previous.cancel()
+            self._latest[key] = future
+        if not quiet:
+            self._pending += 1
+        future.add_done_callback(
+            lambda done: self._results.put((done, key, on_success, on_error, quiet))
+        )
+        self._update_busy()
+        return future
+
+    def post(self, callback, *args):
+        """Schedule callback(*args) on the Tk thread; safe to call from workers
+
+        Used for progress reporting from long-running jobs.
+        """
+        self._posted.put((callback, args))
+
+    def cancel(self, key):
+        """Cancel or discard the latest job submitted under key"""
+        future = self._latest.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def shutdown(self):
+        """Stop polling and drop queued jobs; running ones finish unobserved"""
+        self._closed = True
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _update_busy(self):
+        busy = self.busy
+        if busy != self._busy:
+            self._busy = busy
+            if self.on_busy_change is not None:
+                self.on_busy_change(busy)
+
+    def _poll(self):
+        if self._closed:
+            return
+        while True:
+            try:
+                callback, args = self._posted.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception:
+                self.root.report_callback_exception(*sys.exc_info())
+            if self._closed:
+                return
+        while True:
+            try:
+                future, key, on_success, on_error, quiet = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if not quiet:
+                self._pending -= 1
+            if key is not None:
+                if self._latest.get(key) is not future:
+                    continue  # superseded by a newer job
+                del self._latest[key]
+            if future.cancelled():
+                continue
+            try:
+                error = future.exception()
+                if error is None:
+                    if on_success is not None:
+                        on_success(future.result())
+                elif on_error is not None:
+                    on_error(error)
+                else:
+                    print(f"Background task failed: {error}")
+            except Exception:
+                # Keep polling even when a callback blows up
+                self.root.report_callback_exception(*sys.exc_info())
+            # A callback may have shut us down and destroyed the window
+            if self._closed:
+                return
+        self._update_busy()
+        self.root.after(self.POLL_MS, self._poll)